@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import logging
+import posixpath
+import tempfile
+import zipfile
+from contextlib import ExitStack
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import config
+from app.api.jobs import job_manager
+from app.api.responses import FastJSONResponse
+from app.api.upload import PDF_MAGIC, read_pdf_upload, workflow_generator
+from app.services import metrics
+from app.services.job_manager import JobQueueFull
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# (filename, coroutine function returning (pdf_bytes, sha256 hex digest))
+BatchEntry = Tuple[str, Callable[[], Awaitable[Tuple[bytes, str]]]]
+
+
+async def read_zip_upload(
+        file: UploadFile,
+        stack: ExitStack) -> List[Tuple[zipfile.ZipFile, zipfile.ZipInfo]]:
+    """
+    Spool a zip archive upload to a temporary file and list the PDFs in it.
+
+    The archive is copied to disk chunk by chunk, so it is never held in
+    memory; members are only decompressed when their entry is read. The
+    archive and the total uncompressed size of its PDFs are both limited
+    to BATCH_MAX_ZIP_SIZE, the latter checked from the zip directory.
+
+    Args:
+        file: The uploaded archive
+        stack: Closes the spooled archive once the batch is done
+
+    Returns:
+        List of (archive, member info) for every .pdf member
+    """
+    limit_mb = config.BATCH_MAX_ZIP_SIZE // (1024 * 1024)
+    size_error = HTTPException(status_code=413,
+                               detail=f"Archive exceeds {limit_mb}MB limit")
+
+    spool = stack.enter_context(tempfile.TemporaryFile(dir=config.UPLOAD_DIR))
+    size = 0
+    with metrics.stage_timer("upload_read"):
+        while True:
+            chunk = await file.read(config.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > config.BATCH_MAX_ZIP_SIZE:
+                raise size_error
+            await asyncio.to_thread(spool.write, chunk)
+
+    def list_members() -> List[Tuple[zipfile.ZipFile, zipfile.ZipInfo]]:
+        spool.seek(0)
+        try:
+            archive = zipfile.ZipFile(spool)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400,
+                                detail="File is not a valid zip archive")
+        stack.callback(archive.close)
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(".pdf")
+            and not posixpath.basename(info.filename).startswith(".")
+            and not info.filename.startswith("__MACOSX/")
+        ]
+        if sum(info.file_size for info in members) > config.BATCH_MAX_ZIP_SIZE:
+            raise size_error
+        return [(archive, info) for info in members]
+
+    return await asyncio.to_thread(list_members)
+
+
+def _read_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+    """Decompress one member, reading at most MAX_FILE_SIZE + 1 bytes"""
+    # ZipFile serialises reads of its shared file object itself
+    with archive.open(info) as member:
+        return member.read(config.MAX_FILE_SIZE + 1)
+
+
+def _zip_member_entry(name: str, archive: zipfile.ZipFile,
+                      info: zipfile.ZipInfo) -> BatchEntry:
+
+    async def read() -> Tuple[bytes, str]:
+        limit_mb = config.MAX_FILE_SIZE // (1024 * 1024)
+        size_error = HTTPException(status_code=413,
+                                   detail=f"File size exceeds {limit_mb}MB "
+                                   f"limit")
+        # The directory's size is checked first; the read is capped too, in
+        # case the directory lies
+        if info.file_size > config.MAX_FILE_SIZE:
+            raise size_error
+        data = await asyncio.to_thread(_read_member, archive, info)
+        if len(data) > config.MAX_FILE_SIZE:
+            raise size_error
+        if not data:
+            raise HTTPException(status_code=400, detail="Empty file uploaded")
+        if PDF_MAGIC not in data[:1024]:
+            raise HTTPException(status_code=400,
+                                detail="File is not a valid PDF")
+        return data, hashlib.sha256(data).hexdigest()
+
+    return name, read
+
+
+def _failed_entry(name: str, error: HTTPException) -> BatchEntry:
+
+    async def read() -> Tuple[bytes, str]:
+        raise error
+
+    return name, read
+
+
+async def collect_entries(files: List[UploadFile],
+                          stack: ExitStack) -> List[BatchEntry]:
+    """
+    Expand the uploads into one entry per PDF, in upload order.
+
+    PDFs and zip members are read lazily by their entry, so only the files
+    in progress are in memory; zip archives are spooled to disk here and
+    stay open on the stack. An archive that cannot be used becomes a
+    single entry that fails with the reason.
+    """
+    entries: List[BatchEntry] = []
+    for file in files:
+        name = file.filename or ""
+        if not name.lower().endswith(".zip"):
+            entries.append((name, lambda file=file: read_pdf_upload(file)))
+            continue
+        try:
+            members = await read_zip_upload(file, stack)
+        except HTTPException as e:
+            entries.append(_failed_entry(name, e))
+            continue
+        if not members:
+            entries.append(
+                _failed_entry(
+                    name,
+                    HTTPException(status_code=400,
+                                  detail="Archive contains no PDF files")))
+        entries += [
+            _zip_member_entry(f"{name}/{info.filename}", archive, info)
+            for archive, info in members
+        ]
+    return entries
+
+
+async def _generate(entry: BatchEntry, file_slots: asyncio.Semaphore,
+                    parse_slots: asyncio.Semaphore,
+                    llm_slots: asyncio.Semaphore) -> Dict[str, Any]:
+    filename, read = entry
+    async with file_slots:
+        try:
+            pdf_bytes, content_hash = await read()
+        except HTTPException as e:
+            return {"filename": filename, "success": False, "error": e.detail}
+
+        result = await workflow_generator.generate_workflow_from_pdf(
+            pdf_bytes=pdf_bytes,
+            filename=filename,
+            content_hash=content_hash,
+            parse_slots=parse_slots,
+            llm_slots=llm_slots)
+    if not result["success"]:
+        return {
+            "filename": filename,
+            "success": False,
+            "error": result["error"]
+        }
+    return {
+        "filename": filename,
+        "success": True,
+        "workflow": result["workflow"],
+        "metadata": {
+            "text_length": result.get("text_length", 0),
+            "prompt_text_length": result.get("prompt_text_length"),
+            "estimated_input_tokens": result.get("estimated_input_tokens"),
+            "prompt_trimming": result.get("prompt_trimming"),
+            "cached": result.get("cached", False)
+        }
+    }
+
+
+async def _submit(entry: BatchEntry) -> Dict[str, Any]:
+    filename, read = entry
+    try:
+        pdf_bytes, content_hash = await read()
+        job_id = job_manager.submit(pdf_bytes=pdf_bytes,
+                                    filename=filename,
+                                    content_hash=content_hash)
+    except HTTPException as e:
+        return {"filename": filename, "success": False, "error": e.detail}
+    except JobQueueFull as e:
+        return {"filename": filename, "success": False, "error": str(e)}
+    return {"filename": filename, "success": True, "workflow_id": job_id}
+
+
+@router.post("/upload/batch", response_class=FastJSONResponse)
+async def upload_batch(
+    files: List[UploadFile] = File(...,
+                                   description="PDF files and/or zip "
+                                   "archives of PDFs"),
+    background: bool = Query(
+        False,
+        description="Queue each PDF as a job and return job ids instead of "
+        "waiting for the workflows"),
+    parse_concurrency: Optional[int] = Query(
+        None, ge=1, le=64, description="PDFs parsed at once"),
+    llm_concurrency: Optional[int] = Query(
+        None, ge=1, le=64, description="LLM calls in flight at once")
+) -> FastJSONResponse:
+    """
+    Generate workflows for many PDFs in one request.
+
+    Every PDF is processed independently: a bad or failing file gets an
+    error entry in "results" without affecting the rest. Results are in
+    upload order, with zip members named "<archive>/<member>". With
+    background=true each PDF is submitted to the job queue and its
+    workflow_id returned for polling GET /api/jobs/{workflow_id}.
+    """
+    with ExitStack() as stack, metrics.track_in_flight("batch"):
+        entries = await collect_entries(files, stack)
+        if len(entries) > config.BATCH_MAX_FILES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch exceeds {config.BATCH_MAX_FILES} PDF limit")
+        logger.info(f"Processing batch of {len(entries)} PDFs "
+                    f"({'background' if background else 'synchronous'})")
+
+        if background:
+            results = [await _submit(entry) for entry in entries]
+        else:
+            parse_concurrency = (parse_concurrency
+                                 or config.BATCH_PARSE_CONCURRENCY)
+            llm_concurrency = llm_concurrency or config.BATCH_LLM_CONCURRENCY
+            # Files in progress are bounded so memory stays proportional to
+            # the concurrency, not the batch size
+            file_slots = asyncio.Semaphore(parse_concurrency + llm_concurrency)
+            parse_slots = asyncio.Semaphore(parse_concurrency)
+            llm_slots = asyncio.Semaphore(llm_concurrency)
+            results = await asyncio.gather(
+                *(_generate(entry, file_slots, parse_slots, llm_slots)
+                  for entry in entries))
+
+    succeeded = sum(1 for result in results if result["success"])
+    return FastJSONResponse({
+        "success": True,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    })
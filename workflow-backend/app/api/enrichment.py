@@ -0,0 +1,49 @@
+import logging
+from typing import Dict, Any
+from fastapi import APIRouter, HTTPException
+
+from app.models.enrichment import BatchEnrichmentRequest
+from app.services.enrichment_service import EnrichmentService
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Initialize the enrichment service
+enrichment_service = EnrichmentService()
+
+
+def _batch_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    if "error" in result:
+        raise HTTPException(status_code=503, detail=result["error"])
+    return result
+
+
+@router.post("/enrich/terms")
+async def define_terms(request: BatchEnrichmentRequest) -> Dict[str, Any]:
+    """Define a list of terms in one LLM round trip"""
+    return _batch_response(await enrichment_service.define_terms(
+        request.items, request.context))
+
+
+@router.post("/enrich/principles")
+async def explain_principles(
+        request: BatchEnrichmentRequest) -> Dict[str, Any]:
+    """Explain a list of principles/method rationales in one round trip"""
+    return _batch_response(await enrichment_service.explain_principles(
+        request.items, request.context))
+
+
+@router.post("/enrich/reagents")
+async def get_reagents_info(
+        request: BatchEnrichmentRequest) -> Dict[str, Any]:
+    """Look up a list of reagents/materials in one round trip"""
+    return _batch_response(await enrichment_service.get_reagents_info(
+        request.items, request.context))
+
+
+@router.get("/enrich/cache/stats")
+async def enrichment_cache_stats() -> Dict[str, Any]:
+    """Enrichment cache hit/miss statistics"""
+    if enrichment_service.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **enrichment_service.cache.stats()}
@@ -0,0 +1,75 @@
+import logging
+from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.api.upload import read_pdf_upload, workflow_generator
+from app.models.workflow import ProcessingStatus, UploadResponse
+from app.services import json_codec
+from app.services.job_manager import JobManager, JobQueueFull
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Background job runner sharing the upload endpoint's generator and cache
+job_manager = JobManager(workflow_generator)
+
+
+@router.post("/jobs", response_model=UploadResponse, status_code=202)
+async def create_job(file: UploadFile = File(...)) -> UploadResponse:
+    """
+    Upload a PDF and queue workflow generation (asynchronous processing).
+
+    Returns a workflow_id immediately; poll GET /api/jobs/{workflow_id}.
+    """
+    file_contents, content_hash = await read_pdf_upload(file)
+
+    try:
+        job_id = job_manager.submit(pdf_bytes=file_contents,
+                                    filename=file.filename,
+                                    content_hash=content_hash)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    logger.info(
+        f"Queued PDF: {file.filename} ({len(file_contents)} bytes) as {job_id}")
+    return UploadResponse(success=True,
+                          message="Workflow generation queued",
+                          workflow_id=job_id)
+
+
+@router.get("/jobs/{job_id}", response_model=ProcessingStatus)
+async def get_job(job_id: str) -> ProcessingStatus:
+    """
+    Report job progress, including the workflow once completed
+    """
+    status = job_manager.get(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return status
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    """
+    Server-Sent Events stream of a job's pipeline events.
+
+    Replays events emitted so far, then streams new ones (upload_received,
+    parser_chosen, text_extracted, prompt_built, llm_first_byte,
+    llm_completed, json_parsed, completed/failed) until the job finishes.
+    Each event carries a timestamp, elapsed_ms and duration_ms.
+    """
+    events = job_manager.get_events(job_id)
+    if events is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def event_stream():
+        async for event in events.subscribe():
+            data = json_codec.dumps(event)
+            yield f"event: {event['event']}\ndata: {data}\n\n"
+
+    return StreamingResponse(event_stream(),
+                             media_type="text/event-stream",
+                             headers={
+                                 "Cache-Control": "no-cache",
+                                 "X-Accel-Buffering": "no"
+                             })
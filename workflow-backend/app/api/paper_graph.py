@@ -1,35 +1,67 @@
-from fastapi import APIRouter, Query
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Any, Optional
 import httpx
+import logging
+
+import config
+from app.services.citation_graph import build_citation_graph
+from app.services.openalex_client import openalex_client
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-OPENALEX_BASE = "https://api.openalex.org/works"
 
 @router.get("/paper-graph")
-async def paper_graph(title: str = Query(..., description="Paper title to search for")) -> Dict[str, Any]:
+async def paper_graph(
+    title: str = Query(..., description="Paper title to search for"),
+    depth: int = Query(1, ge=1, le=4, description="Citation hops to expand"),
+    max_nodes: int = Query(200,
+                           ge=1,
+                           le=2000,
+                           description="Maximum nodes in the graph"),
+    fan_out: int = Query(
+        25,
+        ge=0,
+        le=200,
+        description="Maximum references/citing works followed per paper"),
+    cited_by: bool = Query(False, description="Also follow citing papers"),
+    time_budget: Optional[float] = Query(
+        None,
+        gt=0,
+        le=120,
+        description="Seconds to spend expanding before returning a partial "
+        "graph")
+) -> Dict[str, Any]:
     """
     Given a paper title, fetch related papers and build a citation graph using OpenAlex.
+
+    The graph is expanded breadth-first from the best title match; each
+    level is fetched with concurrent batched OpenAlex queries over the
+    shared connection pool. "partial" is true if the time budget ran out.
     """
-    async with httpx.AsyncClient() as client:
+    try:
         # Search for the paper by title
-        resp = await client.get(OPENALEX_BASE, params={"search": title, "per-page": 1})
-        resp.raise_for_status()
-        data = resp.json()
-        if not data.get("results"):
-            return {"nodes": [], "edges": []}
-        main_paper = data["results"][0]
-        main_id = main_paper["id"]
-        main_title = main_paper["display_name"]
-        # Get references (cited works)
-        cited_ids = main_paper.get("referenced_works", [])[:5]  # limit for demo
-        nodes = [{"id": main_id, "label": main_title, "main": True}]
-        edges = []
-        # Fetch cited papers
-        for cited_id in cited_ids:
-            cited_resp = await client.get(cited_id)
-            cited_resp.raise_for_status()
-            cited = cited_resp.json()
-            nodes.append({"id": cited["id"], "label": cited["display_name"]})
-            edges.append({"from": main_id, "to": cited["id"], "type": "cites"})
-        return {"nodes": nodes, "edges": edges} 
\ No newline at end of file
+        main_paper = await openalex_client.search(title)
+        if main_paper is None:
+            return {"nodes": [], "edges": [], "partial": False, "levels": 0}
+
+        return await build_citation_graph(
+            openalex_client,
+            main_paper,
+            depth=depth,
+            max_nodes=max_nodes,
+            fan_out=fan_out,
+            cited_by=cited_by,
+            time_budget=time_budget or config.OPENALEX_GRAPH_TIME_BUDGET)
+    except httpx.HTTPError as e:
+        logger.error(f"OpenAlex request failed for '{title}': {e!r}")
+        raise HTTPException(status_code=502,
+                            detail="Could not reach OpenAlex")
+
+
+@router.get("/paper-graph/store/stats")
+async def paper_graph_store_stats() -> Dict[str, Any]:
+    """Local OpenAlex work store hit/miss/revalidation statistics"""
+    if openalex_client.store is None:
+        return {"enabled": False}
+    return {"enabled": True, **openalex_client.store.stats()}
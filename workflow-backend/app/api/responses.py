@@ -0,0 +1,17 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from app.services import json_codec
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with the fast JSON codec (orjson when installed).
+
+    Return it directly from an endpoint to also skip FastAPI's
+    jsonable_encoder pass over large workflow payloads.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return json_codec.dumps_bytes(content)
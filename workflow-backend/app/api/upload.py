@@ -1,56 +1,127 @@
 import os
+import hashlib
 import logging
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
+import config
+from app.api.responses import FastJSONResponse
+from app.api.enrichment import enrichment_service
+from app.services import metrics
+from app.services.enrichment_prewarmer import EnrichmentPrewarmer
 from app.services.workflow_generator import WorkflowGenerator
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Background enrichment of generated workflows' reagents and equipment
+prewarmer = (EnrichmentPrewarmer(enrichment_service)
+             if config.ENRICHMENT_PREWARM_ENABLED else None)
+
 # Initialize the workflow generator
-workflow_generator = WorkflowGenerator()
+workflow_generator = WorkflowGenerator(prewarmer=prewarmer)
+
+# PDF files start with this header (within the first 1024 bytes per spec)
+PDF_MAGIC = b"%PDF"
+
+# Single-PDF upload routes, rejected by Content-Length before form parsing
+SINGLE_PDF_ROUTES = ("/api/upload", "/api/jobs")
+
+# Allowance for multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
 
 
-@router.post("/upload")
-async def upload_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
+def upload_size_error() -> HTTPException:
+    limit_mb = config.MAX_FILE_SIZE // (1024 * 1024)
+    return HTTPException(status_code=413,
+                         detail=f"File size exceeds {limit_mb}MB limit")
+
+
+async def read_pdf_upload(file: UploadFile) -> Tuple[bytes, str]:
     """
-    Upload a PDF file and generate workflow directly (synchronous processing)
+    Read an uploaded PDF in chunks, validating it as it streams in.
+
+    The upload is rejected as soon as it exceeds MAX_FILE_SIZE or its first
+    chunk lacks the %PDF header, so oversized or bogus files never get
+    buffered in full. The SHA-256 digest is computed incrementally. Requests
+    whose Content-Length is already too large are turned away earlier, by
+    the app's middleware, before the multipart form is parsed.
+
+    Args:
+        file: The uploaded file
+
+    Returns:
+        Tuple of (pdf_bytes, sha256 hex digest); the bytes are accumulated
+        in place and returned as a bytearray rather than copied
     """
-    try:
-        # Validate file type
-        if not file.filename.lower().endswith('.pdf'):
-            raise HTTPException(status_code=400,
-                                detail="Only PDF files are supported")
+    if not file.filename or not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400,
+                            detail="Only PDF files are supported")
+
+    size_error = upload_size_error()
+
+    # Multipart parsing may already know the size, reject without reading
+    if getattr(file, "size", None) and file.size > config.MAX_FILE_SIZE:
+        raise size_error
 
-        # Check file size (50MB limit as requested)
-        file_size = 0
-        file_contents = await file.read()
-        file_size = len(file_contents)
+    digest = hashlib.sha256()
+    data = bytearray()
 
-        if file_size > 50 * 1024 * 1024:  # 50MB in bytes
-            raise HTTPException(status_code=413,
-                                detail="File size exceeds 50MB limit")
+    with metrics.stage_timer("upload_read"):
+        while True:
+            chunk = await file.read(config.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
 
-        if file_size == 0:
-            raise HTTPException(status_code=400, detail="Empty file uploaded")
+            if not data and PDF_MAGIC not in chunk[:1024]:
+                raise HTTPException(status_code=400,
+                                    detail="File is not a valid PDF")
 
-        logger.info(f"Processing PDF: {file.filename} ({file_size} bytes)")
+            if len(data) + len(chunk) > config.MAX_FILE_SIZE:
+                raise size_error
+
+            digest.update(chunk)
+            data += chunk
+
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty file uploaded")
+
+    return data, digest.hexdigest()
+
+
+@router.post("/upload", response_class=FastJSONResponse)
+async def upload_pdf(file: UploadFile = File(...)) -> FastJSONResponse:
+    """
+    Upload a PDF file and generate workflow directly (synchronous processing)
+    """
+    try:
+        # Stream the upload, rejecting bad or oversized files early
+        file_contents, content_hash = await read_pdf_upload(file)
+
+        logger.info(
+            f"Processing PDF: {file.filename} ({len(file_contents)} bytes)")
 
         # Generate workflow directly from PDF bytes
         result = await workflow_generator.generate_workflow_from_pdf(
-            pdf_bytes=file_contents, filename=file.filename)
+            pdf_bytes=file_contents,
+            filename=file.filename,
+            content_hash=content_hash)
 
         if result["success"]:
-            return {
+            return FastJSONResponse({
                 "success": True,
                 "message": "Workflow generated successfully",
                 "workflow": result["workflow"],
                 "metadata": {
                     "filename": result["filename"],
-                    "text_length": result.get("text_length", 0)
+                    "text_length": result.get("text_length", 0),
+                    "prompt_text_length": result.get("prompt_text_length"),
+                    "estimated_input_tokens":
+                    result.get("estimated_input_tokens"),
+                    "prompt_trimming": result.get("prompt_trimming"),
+                    "cached": result.get("cached", False)
                 }
-            }
+            })
         else:
             logger.error(f"Workflow generation failed: {result['error']}")
             raise HTTPException(
@@ -69,3 +140,11 @@ async def upload_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "workflow-backend"}
+
+
+@router.get("/cache/stats")
+async def cache_stats() -> Dict[str, Any]:
+    """Workflow cache hit/miss statistics"""
+    if workflow_generator.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **workflow_generator.cache.stats()}
@@ -1,12 +1,23 @@
 import logging
+import time
 import uvicorn
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-
-from app.api.upload import router as upload_router
+from fastapi.responses import JSONResponse, Response
+
+import config
+from app.api.upload import (router as upload_router, prewarmer,
+                            MULTIPART_OVERHEAD, SINGLE_PDF_ROUTES,
+                            upload_size_error)
+from app.api.jobs import router as jobs_router, job_manager
+from app.api.batch import router as batch_router
+from app.api.enrichment import router as enrichment_router
+from app.api.paper_graph import router as paper_graph_router
+from app.services import metrics
+from app.services.openalex_client import openalex_client
+from app.services.pdf_pool import extraction_pool
 
 # Configure logging
 logging.basicConfig(
@@ -22,11 +33,18 @@ async def lifespan(app: FastAPI):
     """
     # Startup
     logger.info("Starting Workflow Generator API")
+    extraction_pool.start()
+    await job_manager.start()
 
     yield
 
     # Shutdown
     logger.info("Shutting down Workflow Generator API")
+    await job_manager.stop()
+    if prewarmer is not None:
+        await prewarmer.stop()
+    extraction_pool.shutdown()
+    await openalex_client.close()
 
 
 # Create FastAPI application
@@ -53,8 +71,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """
+    Reject single-PDF uploads whose declared Content-Length is too large.
+
+    This runs before FastAPI parses the multipart form, which would
+    otherwise spool the whole body to disk first. Requests without a
+    Content-Length (chunked) are still capped while read_pdf_upload streams
+    the file.
+    """
+    if request.method == "POST" and request.url.path in SINGLE_PDF_ROUTES:
+        length = request.headers.get("content-length", "")
+        if (length.isdigit()
+                and int(length) > config.MAX_FILE_SIZE + MULTIPART_OVERHEAD):
+            error = upload_size_error()
+            return JSONResponse(status_code=error.status_code,
+                                content={"detail": error.detail})
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Record latency and in-flight count per route.
+
+    For streaming responses the latency covers time to the first byte.
+    """
+    started = time.perf_counter()
+    status = 500
+    try:
+        with metrics.track_in_flight("http_request"):
+            response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_SECONDS.labels(
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status)).observe(time.perf_counter() - started)
+
+
 # Include routers
 app.include_router(upload_router, prefix="/api", tags=["upload"])
+app.include_router(jobs_router, prefix="/api", tags=["jobs"])
+app.include_router(batch_router, prefix="/api", tags=["batch"])
+app.include_router(enrichment_router, prefix="/api", tags=["enrichment"])
+app.include_router(paper_graph_router, prefix="/api", tags=["paper-graph"])
 
 
 # Root endpoint
@@ -71,6 +137,16 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    """
+    Prometheus metrics: stage latency histograms, in-flight gauges and
+    cache counters
+    """
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -0,0 +1,7 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class BatchEnrichmentRequest(BaseModel):
+    items: List[str] = Field(..., min_length=1, max_length=500)
+    context: Optional[str] = None  # shared context, e.g. the paper's field
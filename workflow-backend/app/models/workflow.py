@@ -1,29 +1,42 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Dict, List, Optional, Any
 
+# Workflows carry extra LLM fields (labels, metadata, citation, ...) that the
+# visualizer renders, so these models keep unknown keys instead of dropping them
+
 
 class StageEdge(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
     from_: str = Field(alias="from")
     to: str
 
 
 class StepEdge(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
     from_: str = Field(alias="from")
     to: str
-    stage_id: str
+    stage_id: Optional[str] = None
 
 
 class Stage(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
     label: str
     description: str
 
 
 class Step(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
     label: str
     description: str
 
 
 class Workflow(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
     stages: Dict[str, Stage]
     stageEdges: List[StageEdge]
     steps: Dict[str, Step]
@@ -31,7 +44,7 @@ class Workflow(BaseModel):
 
 
 class ProcessingStatus(BaseModel):
-    status: str  # "processing", "completed", "failed"
+    status: str  # "queued", "processing", "completed", "failed"
     progress: int  # 0-100
     message: str
     workflow: Optional[Workflow] = None
@@ -0,0 +1,173 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from . import json_codec
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteCache:
+    """
+    Persistent JSON key/value cache backed by a local SQLite file.
+
+    Entries are evicted least-recently-used first once the stored values
+    exceed max_bytes, and, when ttl is set, expire ttl seconds after they
+    were written. Hit and miss counters are kept for the lifetime of the
+    process.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Look up several keys with a single query and commit.
+
+        Returns:
+            Dict of the keys that were found (misses are omitted)
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        now = time.time()
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value, created_at FROM entries "
+                f"WHERE key IN ({placeholders})", keys).fetchall()
+
+            found = {}
+            expired = []
+            for key, value, created_at in rows:
+                if self.ttl is not None and now - created_at > self.ttl:
+                    expired.append(key)
+                else:
+                    found[key] = value
+
+            if expired:
+                self._conn.executemany("DELETE FROM entries WHERE key = ?",
+                                       [(key, ) for key in expired])
+                self.expirations += len(expired)
+            if found:
+                self._conn.executemany(
+                    "UPDATE entries SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found])
+            if expired or found:
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        return {key: json_codec.loads(value) for key, value in found.items()}
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value and evict old entries if needed"""
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[str, Any]) -> None:
+        """Store several JSON-serializable values in one transaction"""
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            payload = json_codec.dumps(value)
+            size = len(payload.encode("utf-8"))
+            if size > self.max_bytes:
+                logger.warning(f"Not caching {key}: {size} bytes exceeds limit")
+                continue
+            rows.append((key, payload, size, now, now))
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then LRU entries until under max_bytes"""
+        if self.ttl is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM entries WHERE created_at < ?",
+                (time.time() - self.ttl, ))
+            self.expirations += max(cursor.rowcount, 0)
+
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key, ))
+            total -= size
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key, ))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache size"""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+import config
+from . import metrics
+from .enrichment_service import EnrichmentService
+from .llm_scheduler import PRIORITY_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+
+def collect_entities(workflow: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Collect the reagents and equipment named in a workflow's step metadata.
+
+    Entries are de-duplicated case-insensitively across all steps, keeping
+    the first spelling seen, in step order.
+
+    Args:
+        workflow: Workflow dict with a "steps" mapping
+
+    Returns:
+        Dict with "reagents" and "equipment" lists
+    """
+    entities: Dict[str, Dict[str, str]] = {"reagents": {}, "equipment": {}}
+    for step in (workflow.get("steps") or {}).values():
+        metadata = step.get("metadata") if isinstance(step, dict) else None
+        if not isinstance(metadata, dict):
+            continue
+        for kind, seen in entities.items():
+            for name in metadata.get(kind) or []:
+                if isinstance(name, str) and name.strip():
+                    seen.setdefault(" ".join(name.lower().split()),
+                                    name.strip())
+    return {kind: list(seen.values()) for kind, seen in entities.items()}
+
+
+class EnrichmentPrewarmer:
+    """
+    Enriches a finished workflow's reagents and equipment in the background.
+
+    Answers land in the enrichment cache (with no context), so the batch
+    enrichment endpoints return them instantly when a user opens a step.
+    Calls run at background priority on the shared scheduler, behind any
+    interactive request. At most max_pending workflows are warmed at once;
+    further ones are skipped rather than queued.
+    """
+
+    def __init__(self,
+                 service: EnrichmentService,
+                 max_pending: Optional[int] = None):
+        self.service = service
+        self.max_pending = max_pending or config.ENRICHMENT_PREWARM_MAX_PENDING
+        self._tasks: Set[asyncio.Task] = set()
+
+    def schedule(self, workflow: Dict[str, Any], label: str = "") -> bool:
+        """
+        Start warming the cache for a workflow without waiting for it.
+
+        Args:
+            workflow: Generated workflow dict
+            label: Name used in log messages (e.g. the PDF filename)
+
+        Returns:
+            True if a background task was started
+        """
+        if self.service.model is None or self.service.cache is None:
+            return False
+        entities = collect_entities(workflow)
+        if not entities["reagents"] and not entities["equipment"]:
+            return False
+        if len(self._tasks) >= self.max_pending:
+            logger.info(f"Skipping enrichment pre-warm for {label}: "
+                        f"{len(self._tasks)} already pending")
+            return False
+
+        task = asyncio.create_task(self._warm(entities, label))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _warm(self, entities: Dict[str, List[str]], label: str) -> None:
+        try:
+            with metrics.track_in_flight("enrichment_prewarm"), \
+                    metrics.stage_timer("enrichment_prewarm"):
+                results = await asyncio.gather(
+                    self.service.get_reagents_info(
+                        entities["reagents"], priority=PRIORITY_BACKGROUND),
+                    self.service.define_terms(entities["equipment"],
+                                              priority=PRIORITY_BACKGROUND))
+            fetched = sum(
+                len(result.get("data", {})) - result.get("cached", 0)
+                for result in results)
+            logger.info(
+                f"Pre-warmed enrichment for {label}: "
+                f"{len(entities['reagents'])} reagents, "
+                f"{len(entities['equipment'])} equipment, {fetched} fetched")
+        except Exception as e:
+            logger.error(f"Enrichment pre-warm failed for {label}: {e}")
+
+    async def stop(self) -> None:
+        """Cancel pending pre-warm tasks"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,10 +1,60 @@
 import google.generativeai as genai
+import asyncio
+import json
 import logging
-from typing import Dict, Any
+import os
+import re
+from typing import Dict, Any, List, Optional
 import config
+from app.services import json_codec, metrics
+from app.services.cache_store import SQLiteCache
+from app.services.llm_client import AsyncLLMClient
+from app.services.llm_scheduler import PRIORITY_INTERACTIVE, gemini_scheduler
 
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = "gemini-1.5-flash-latest"
+
+# Per-item instructions and answer shape for the batch methods
+BATCH_KINDS = {
+    "term": {
+        "task": "provide a concise, easy-to-understand definition for "
+                "each of these terms",
+        "fields": {
+            "definition": "Clear, concise definition in 1-2 sentences",
+            "example": "Practical example or application",
+            "wikipedia_url": "Wikipedia URL if relevant (or null)",
+            "related_terms": ["List of 2-3 related scientific terms"]
+        }
+    },
+    "principle": {
+        "task": "explain the scientific principle behind each of these "
+                "methods or principles",
+        "fields": {
+            "explanation": "Clear explanation of why this works "
+                           "scientifically",
+            "purpose": "What this achieves in the experiment",
+            "alternatives": ["Alternative methods that could be used"],
+            "key_papers": ["Suggest 1-2 key papers or reviews (title only)"]
+        }
+    },
+    "reagent": {
+        "task": "provide detailed information about each of these research "
+                "reagents/materials",
+        "fields": {
+            "description": "What this reagent is and its primary use",
+            "function": "Its specific role in experiments",
+            "common_suppliers": ["List of 2-3 common suppliers"],
+            "storage_conditions": "How it should be stored",
+            "safety_notes": "Important safety considerations (if any)"
+        }
+    }
+}
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
 
 class EnrichmentService:
     """
@@ -15,17 +65,55 @@ class EnrichmentService:
     - Scientific principle explanations  
     - Rationale for method choices
     - Links to external resources
+
+    Calls go through the shared Gemini scheduler, so enrichment and
+    workflow generation draw on the same rate limits. Answers are cached
+    persistently by normalized (kind, item, context, model), since common
+    terms recur across papers.
     """
 
-    def __init__(self):
+    def __init__(self, cache: Optional[SQLiteCache] = None):
+        self.model_name = MODEL_NAME
+        if cache is None and config.ENRICHMENT_CACHE_ENABLED:
+            cache = SQLiteCache(os.path.join(config.CACHE_DIR,
+                                             "enrichment.sqlite3"),
+                                max_bytes=config.ENRICHMENT_CACHE_MAX_BYTES,
+                                ttl=config.ENRICHMENT_CACHE_TTL)
+        self.cache = cache
+        if cache is not None:
+            metrics.register_cache("enrichment", cache)
+
         if config.GEMINI_API_KEY and config.GEMINI_API_KEY.strip():
             genai.configure(api_key=config.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-1.5-flash-latest')
+            self.model = genai.GenerativeModel(self.model_name)
+            self.client = AsyncLLMClient(self.model,
+                                         scheduler=gemini_scheduler)
         else:
             self.model = None
+            self.client = None
             logger.warning("No Gemini API key provided - Enrichment service disabled")
 
-    def define_term(self, term: str, context: str = None) -> Dict[str, Any]:
+    def cache_key(self,
+                  kind: str,
+                  item: str,
+                  context: Optional[str] = None) -> str:
+        """
+        Build the cache key for an enrichment answer.
+
+        Item and context are case- and whitespace-normalized so "qPCR" and
+        " QPCR " share an entry.
+        """
+        return "|".join((kind, self.model_name, _normalize(item),
+                         _normalize(context or "")))
+
+    def _cache_get(self, key: str) -> Optional[Any]:
+        return self.cache.get(key) if self.cache is not None else None
+
+    def _cache_set(self, key: str, value: Any) -> None:
+        if self.cache is not None:
+            self.cache.set(key, value)
+
+    async def define_term(self, term: str, context: str = None) -> Dict[str, Any]:
         """
         Provide a definition for a scientific term in context.
         
@@ -36,35 +124,9 @@ class EnrichmentService:
         Returns:
             Dict with definition, example, and related links
         """
-        if not self.model:
-            return {"error": "Enrichment service not available"}
+        return await self._enrich_single("term", term, context)
 
-        try:
-            context_phrase = f" in the context of {context}" if context else ""
-            prompt = f"""
-In the context of scientific research{context_phrase}, provide a concise, easy-to-understand definition for the term: "{term}"
-
-Format your response as a JSON object with the following structure:
-{{
-  "term": "{term}",
-  "definition": "Clear, concise definition in 1-2 sentences",
-  "example": "Practical example or application",
-  "wikipedia_url": "Wikipedia URL if relevant (or null)",
-  "related_terms": ["List of 2-3 related scientific terms"]
-}}
-
-Respond only with the JSON object.
-"""
-            
-            response = self.model.generate_content(prompt)
-            # Parse JSON response here
-            return {"success": True, "data": response.text}
-            
-        except Exception as e:
-            logger.error(f"Error in define_term: {str(e)}")
-            return {"error": str(e)}
-
-    def explain_principle(self, principle: str, context: str) -> Dict[str, Any]:
+    async def explain_principle(self, principle: str, context: str) -> Dict[str, Any]:
         """
         Explain a scientific principle or method rationale.
         
@@ -75,33 +137,9 @@ Respond only with the JSON object.
         Returns:
             Dict with explanation and related information
         """
-        if not self.model:
-            return {"error": "Enrichment service not available"}
+        return await self._enrich_single("principle", principle, context)
 
-        try:
-            prompt = f"""
-In the context of {context}, explain the scientific principle behind: "{principle}"
-
-Format your response as a JSON object:
-{{
-  "principle": "{principle}",
-  "explanation": "Clear explanation of why this works scientifically",
-  "purpose": "What this achieves in the experiment",
-  "alternatives": ["Alternative methods that could be used"],
-  "key_papers": ["Suggest 1-2 key papers or reviews (title only)"]
-}}
-
-Respond only with the JSON object.
-"""
-            
-            response = self.model.generate_content(prompt)
-            return {"success": True, "data": response.text}
-            
-        except Exception as e:
-            logger.error(f"Error in explain_principle: {str(e)}")
-            return {"error": str(e)}
-
-    def get_reagent_info(self, reagent: str) -> Dict[str, Any]:
+    async def get_reagent_info(self, reagent: str) -> Dict[str, Any]:
         """
         Get detailed information about a reagent or material.
         
@@ -111,65 +149,182 @@ Respond only with the JSON object.
         Returns:
             Dict with reagent information and supplier links
         """
+        return await self._enrich_single("reagent", reagent, None)
+
+    async def _enrich_single(self, kind: str, item: str,
+                             context: Optional[str]) -> Dict[str, Any]:
+        """
+        Enrich one item through the batch path.
+
+        Sharing the batch path keeps one cache entry per (kind, item,
+        context), holding the parsed answer, whichever method asked first.
+        """
+        result = await self._enrich_batch(kind, [item], context)
+        if "error" in result:
+            return result
+        answer = next(iter(result["data"].values()), None)
+        if answer is None:
+            return {"error": f"No {kind} information returned for {item!r}"}
+        return {
+            "success": True,
+            "data": answer,
+            "cached": result["cached"] > 0
+        }
+
+    async def define_terms(
+            self,
+            terms: List[str],
+            context: str = None,
+            priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """
+        Define several terms sharing one context in a single LLM round trip.
+
+        Args:
+            terms: Scientific terms to define
+            context: Optional shared context (e.g., "mouse reproductive biology")
+            priority: Scheduler priority for the LLM calls
+
+        Returns:
+            Dict with "data" mapping each term to its definition, and
+            "missing" listing terms the model did not answer
+        """
+        return await self._enrich_batch("term", terms, context, priority)
+
+    async def explain_principles(
+            self,
+            principles: List[str],
+            context: str,
+            priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """
+        Explain several principles or method rationales in one round trip.
+
+        Args:
+            principles: Principles or methods to explain
+            context: The shared experimental context
+            priority: Scheduler priority for the LLM calls
+
+        Returns:
+            Dict with "data" mapping each principle to its explanation, and
+            "missing" listing principles the model did not answer
+        """
+        return await self._enrich_batch("principle", principles, context,
+                                        priority)
+
+    async def get_reagents_info(
+            self,
+            reagents: List[str],
+            context: str = None,
+            priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """
+        Get information about several reagents in one round trip.
+
+        Args:
+            reagents: Reagent/material names
+            context: Optional shared experimental context
+            priority: Scheduler priority for the LLM calls
+
+        Returns:
+            Dict with "data" mapping each reagent to its information, and
+            "missing" listing reagents the model did not answer
+        """
+        return await self._enrich_batch("reagent", reagents, context,
+                                        priority)
+
+    async def _enrich_batch(
+            self,
+            kind: str,
+            items: List[str],
+            context: Optional[str],
+            priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """
+        Enrich a list of items of one kind.
+
+        Cached items are answered without an LLM call. The remaining items
+        are de-duplicated and lists longer than ENRICHMENT_BATCH_SIZE
+        are split into sub-batches that run concurrently (subject to the
+        shared scheduler). A batch whose answer cannot be parsed is split
+        in half and retried; a failed sub-batch only marks its own items
+        as missing.
+        """
         if not self.model:
             return {"error": "Enrichment service not available"}
 
-        try:
-            prompt = f"""
-Provide detailed information about the research reagent/material: "{reagent}"
-
-Format your response as a JSON object:
-{{
-  "reagent": "{reagent}",
-  "description": "What this reagent is and its primary use",
-  "function": "Its specific role in experiments",
-  "common_suppliers": ["List of 2-3 common suppliers"],
-  "storage_conditions": "How it should be stored",
-  "safety_notes": "Important safety considerations (if any)"
-}}
+        unique = list(dict.fromkeys(item.strip() for item in items
+                                    if item and item.strip()))
+        keys = {item: self.cache_key(kind, item, context) for item in unique}
+        cached = self.cache.get_many(keys.values()) if self.cache else {}
+        data: Dict[str, Any] = {
+            item: cached[key]
+            for item, key in keys.items() if key in cached
+        }
+        pending = [item for item in unique if item not in data]
 
-Respond only with the JSON object.
-"""
-            
-            response = self.model.generate_content(prompt)
-            return {"success": True, "data": response.text}
-            
-        except Exception as e:
-            logger.error(f"Error in get_reagent_info: {str(e)}")
-            return {"error": str(e)}
+        size = max(1, config.ENRICHMENT_BATCH_SIZE)
+        batches = [pending[i:i + size] for i in range(0, len(pending), size)]
+        results = await asyncio.gather(
+            *(self._enrich_one_batch(kind, batch, context, priority)
+              for batch in batches),
+            return_exceptions=True)
+
+        fetched: Dict[str, Any] = {}
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    f"Error enriching {len(batch)} {kind}s: {str(result)}")
+                continue
+            fetched.update(result)
+        if self.cache is not None and fetched:
+            self.cache.set_many(
+                {keys[item]: value for item, value in fetched.items()})
+        data.update(fetched)
+
+        missing = [item for item in unique if item not in data]
+        if missing:
+            logger.warning(f"No enrichment returned for {kind}s: {missing}")
+        return {
+            "success": True,
+            "data": {item: data[item] for item in unique if item in data},
+            "missing": missing,
+            "cached": len(cached)
+        }
 
+    async def _enrich_one_batch(self, kind: str, items: List[str],
+                                context: Optional[str],
+                                priority: int) -> Dict[str, Any]:
+        spec = BATCH_KINDS[kind]
+        context_phrase = f" in the context of {context}" if context else ""
+        item_list = "\n".join(f"- {json.dumps(item)}" for item in items)
+        prompt = f"""
+In the context of scientific research{context_phrase}, {spec["task"]}:
+{item_list}
 
-# Example usage patterns for future implementation:
+Format your response as a JSON object whose keys are the items exactly as written above, each mapped to an object with the following structure:
+{json.dumps(spec["fields"], indent=2)}
+
+Respond only with the JSON object.
 """
-# In your API endpoints (future Tier 2 implementation):
-
-@app.post("/api/enrich/define")
-async def define_term_endpoint(term: str, context: str = None):
-    enrichment_service = EnrichmentService()
-    result = enrichment_service.define_term(term, context)
-    return result
-
-@app.post("/api/enrich/explain")  
-async def explain_principle_endpoint(principle: str, context: str):
-    enrichment_service = EnrichmentService()
-    result = enrichment_service.explain_principle(principle, context)
-    return result
-
-@app.post("/api/enrich/reagent")
-async def reagent_info_endpoint(reagent: str):
-    enrichment_service = EnrichmentService()
-    result = enrichment_service.get_reagent_info(reagent)
-    return result
-
-# In your React frontend (future Tier 3 implementation):
-
-const handleTermClick = async (term, context) => {
-  const response = await fetch('/api/enrich/define', {
-    method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ term, context })
-  });
-  const definition = await response.json();
-  // Display in modal/tooltip
-};
-""" 
\ No newline at end of file
+        response = await self.client.generate_content(prompt,
+                                                      priority=priority)
+        try:
+            answers = json_codec.parse_json_object(response.text)
+        except ValueError:
+            if len(items) == 1:
+                raise
+            # Usually a response truncated at the output limit: halve it
+            middle = len(items) // 2
+            logger.warning(f"Unparsable batch of {len(items)} {kind}s, "
+                           f"retrying as two halves")
+            halves = await asyncio.gather(
+                self._enrich_one_batch(kind, items[:middle], context,
+                                       priority),
+                self._enrich_one_batch(kind, items[middle:], context,
+                                       priority))
+            return {**halves[0], **halves[1]}
+
+        # Match answers to the requested spelling, ignoring case/whitespace
+        by_key = {str(key).strip().lower(): value
+                  for key, value in answers.items()}
+        return {
+            item: by_key[item.lower()]
+            for item in items if isinstance(by_key.get(item.lower()), dict)
+        }
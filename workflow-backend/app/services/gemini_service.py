@@ -1,56 +1,132 @@
 import google.generativeai as genai
+import asyncio
 import json
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from app.models.workflow import Workflow
+from app.services import json_codec, metrics
+from app.services.json_stream import IncrementalWorkflowParser
+from app.services.llm_client import AsyncLLMClient
+from app.services.llm_scheduler import gemini_scheduler
+from app.services.pipeline_events import PipelineEvents, ensure_events
+from app.services.prompt_reducer import (chunk_paper_text, estimate_tokens,
+                                         fit_paper_text)
+from app.services.workflow_merger import merge_workflows
 import config
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever _create_workflow_prompt or the text fed into it changes so
+# cached workflows generated with the old prompt are not reused
+PROMPT_VERSION = "tier1-v4"
+MODEL_NAME = "gemini-2.0-flash"
+
+
+def _sum_fits(fits: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine the per-chunk prompt fits of a map-reduce extraction"""
+    return {
+        "estimated_input_tokens":
+        sum(fit["estimated_input_tokens"] for fit in fits),
+        "input_token_budget": config.PROMPT_INPUT_TOKEN_BUDGET,
+        "trimmed_tokens": sum(fit["trimmed_tokens"] for fit in fits),
+        "trimmed_chars": sum(fit["trimmed_chars"] for fit in fits),
+        "sections_dropped":
+        [name for fit in fits for name in fit["sections_dropped"]],
+        "sections_truncated":
+        [name for fit in fits for name in fit["sections_truncated"]],
+        "prompts": sum(fit["prompts"] for fit in fits)
+    }
+
 
 class GeminiService:
 
     def __init__(self):
+        self.model_name = MODEL_NAME
+        self.prompt_version = PROMPT_VERSION
         if config.GEMINI_API_KEY and config.GEMINI_API_KEY.strip():
             genai.configure(api_key=config.GEMINI_API_KEY)
             # Use the correct model name for current API
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
+            self.model = genai.GenerativeModel(self.model_name)
+            self.client = AsyncLLMClient(self.model,
+                                         scheduler=gemini_scheduler)
         else:
             self.model = None
+            self.client = None
             logger.warning(
                 "No Gemini API key provided - using sample workflow")
 
-    def generate_workflow_from_text(
+    async def generate_workflow_from_text(
             self,
             paper_text: str,
-            paper_metadata: Dict = None) -> Dict[str, Any]:
+            paper_metadata: Dict = None,
+            events: Optional[PipelineEvents] = None) -> Dict[str, Any]:
         """
         Generate workflow JSON from paper text using Gemini AI
+
+        The response is streamed and parsed incrementally: each stage, step
+        and edge is emitted as a "workflow_item" event as soon as its JSON
+        object closes, so clients can render early stages before the full
+        response arrives. Time to first byte, prompt size and parse time
+        are reported through events too. Papers longer than
+        MAPREDUCE_THRESHOLD_TOKENS are extracted chunk by chunk.
+
+        Every prompt is fitted to PROMPT_INPUT_TOKEN_BUDGET; the result's
+        "prompt" dict reports the estimated input tokens and the trimming
+        applied (summed over chunks for map-reduce).
         """
+        events = ensure_events(events)
         if not self.model:
             # Return sample workflow for testing when no API key
-            sample_workflow = self._get_sample_workflow()
-            return {"success": True, "workflow": sample_workflow["workflow"]}
+            return self._get_sample_workflow()
 
         try:
-            prompt = self._create_workflow_prompt(paper_text, paper_metadata)
+            if (config.MAPREDUCE_ENABLED and estimate_tokens(paper_text) >
+                    config.MAPREDUCE_THRESHOLD_TOKENS):
+                return await self._generate_workflow_map_reduce(
+                    paper_text, paper_metadata, events)
 
-            response = self.model.generate_content(prompt)
+            with metrics.stage_timer("prompt_build"):
+                prompt, fit = self._fit_prompt(paper_text, paper_metadata)
+            events.emit("prompt_built",
+                        prompt_chars=len(prompt),
+                        input_tokens=fit["estimated_input_tokens"],
+                        trimmed_tokens=fit["trimmed_tokens"])
+
+            chunks = []
+            stream_parser = IncrementalWorkflowParser()
+            async for chunk in self.client.stream_content(prompt):
+                if not chunks:
+                    events.emit("llm_first_byte")
+                chunks.append(chunk)
+                for section, item_id, item in stream_parser.feed(chunk):
+                    events.emit("workflow_item",
+                                section=section,
+                                id=item_id,
+                                item=item)
+            response_text = "".join(chunks)
+            events.emit("llm_completed", response_chars=len(response_text))
 
             # DEBUG: Log the raw Gemini response
-            logger.info("🔍 RAW GEMINI RESPONSE:")
-            logger.info("=" * 80)
-            logger.info(response.text)
-            logger.info("=" * 80)
+            logger.debug("🔍 RAW GEMINI RESPONSE:")
+            logger.debug("=" * 80)
+            logger.debug(response_text)
+            logger.debug("=" * 80)
 
             # Parse JSON response
-            workflow_json = self._parse_response(response.text)
+            workflow_json = self._parse_response(response_text)
+            workflow_json["prompt"] = fit
+            workflow = workflow_json.get("workflow") or {}
+            events.emit("json_parsed",
+                        stages=len(workflow.get("stages", {})),
+                        steps=len(workflow.get("steps", {})),
+                        fallback=bool(workflow_json.get("fallback")))
 
             # DEBUG: Log the parsed workflow JSON
-            logger.info("🎯 PARSED WORKFLOW JSON:")
-            logger.info("=" * 80)
-            logger.info(json.dumps(workflow_json, indent=2))
-            logger.info("=" * 80)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🎯 PARSED WORKFLOW JSON:")
+                logger.debug("=" * 80)
+                logger.debug(json.dumps(workflow_json, indent=2))
+                logger.debug("=" * 80)
 
             return workflow_json
 
@@ -59,11 +135,136 @@ class GeminiService:
             logger.error(error_msg)
             return {"success": False, "error": error_msg}
 
-    def _create_workflow_prompt(self, paper_text: str, metadata: Dict = None) -> str:
+    async def _generate_workflow_map_reduce(
+            self, paper_text: str, paper_metadata: Optional[Dict],
+            events: PipelineEvents) -> Dict[str, Any]:
+        """
+        Extract partial workflows from section-aligned chunks concurrently
+        and merge them into one workflow.
+
+        Wall-clock time is bounded by the slowest chunk rather than the
+        length of the whole paper. Chunks that fail are skipped; if every
+        chunk fails the sample workflow is returned.
+        """
+        chunks = chunk_paper_text(paper_text, config.MAPREDUCE_CHUNK_TOKENS)
+        events.emit("map_reduce_started", chunks=len(chunks))
+        limit = asyncio.Semaphore(config.MAPREDUCE_CONCURRENCY)
+
+        fits = [
+            self._fit_prompt(chunk, paper_metadata, part=(i + 1, len(chunks)))
+            for i, chunk in enumerate(chunks)
+        ]
+        fit = _sum_fits([chunk_fit for _, chunk_fit in fits])
+
+        async def extract_chunk(index: int, prompt: str) -> Dict[str, Any]:
+            async with limit:
+                response = await self.client.generate_content(prompt)
+                result = self._parse_response(response.text)
+            events.emit("chunk_parsed",
+                        chunk=index + 1,
+                        prompt_chars=len(prompt),
+                        fallback=bool(result.get("fallback")))
+            return result
+
+        results = await asyncio.gather(
+            *(extract_chunk(i, prompt) for i, (prompt, _) in enumerate(fits)),
+            return_exceptions=True)
+
+        partials = []
+        for index, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Chunk {index + 1}/{len(chunks)} failed: {result}")
+            elif result.get("success") and not result.get("fallback"):
+                partials.append(result["workflow"])
+
+        if not partials:
+            logger.error("Every chunk failed - falling back to sample workflow")
+            return {**self._get_sample_workflow(), "prompt": fit}
+
+        workflow = merge_workflows(partials)
+        events.emit("json_parsed",
+                    stages=len(workflow["stages"]),
+                    steps=len(workflow["steps"]),
+                    chunks_merged=len(partials),
+                    fallback=False)
+        logger.info(
+            f"Merged {len(partials)}/{len(chunks)} chunk workflows into "
+            f"{len(workflow['stages'])} stages, {len(workflow['steps'])} steps")
+        return {"success": True, "workflow": workflow, "prompt": fit}
+
+    def _fit_prompt(
+            self,
+            paper_text: str,
+            metadata: Dict = None,
+            part: Optional[Tuple[int, int]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the workflow prompt with the paper text trimmed so the whole
+        prompt's estimated tokens stay within PROMPT_INPUT_TOKEN_BUDGET.
+
+        Returns:
+            (prompt, fit): fit has the prompt's "estimated_input_tokens",
+            the "input_token_budget" and what fit_paper_text() trimmed
+        """
+        overhead = estimate_tokens(
+            self._create_workflow_prompt("", metadata, part))
+        budget = config.PROMPT_INPUT_TOKEN_BUDGET
+        if overhead >= budget:
+            logger.warning(f"Prompt template alone is ~{overhead} tokens, "
+                           f"over PROMPT_INPUT_TOKEN_BUDGET={budget}")
+        fit = fit_paper_text(paper_text, budget - overhead)
+        prompt = self._create_workflow_prompt(fit.pop("text"), metadata, part)
+        fit.pop("estimated_tokens")
+        return prompt, {
+            "estimated_input_tokens": estimate_tokens(prompt),
+            "input_token_budget": budget,
+            **fit, "prompts": 1
+        }
+
+    def _create_workflow_prompt(self,
+                                paper_text: str,
+                                metadata: Dict = None,
+                                part: Optional[Tuple[int, int]] = None) -> str:
         """
         Creates the Final Tier prompt to generate a comprehensive, interactive-ready workflow.
+
+        When part=(i, n) is given the text is treated as the i-th of n chunks
+        of the paper, for map-reduce extraction. Chunk prompts carry no
+        stage or step quotas: each chunk yields only what it describes, and
+        merge_workflows() sets the final shape.
         """
         
+        # Whole-paper prompts ask for a complete workflow; chunk prompts are
+        # restricted to the steps described in that chunk
+        task_scope = (
+            "Break down ALL methodology into multiple stages and multiple "
+            "steps per stage. The paper likely contains 15-30 individual "
+            "experimental steps across 4-6 major stages.")
+        stage_guideline = (
+            "Identify 4-6 major experimental phases (e.g., \"Construct "
+            "Design\", \"Animal Generation\", \"Phenotypic Analysis\", "
+            "\"Molecular Analysis\")")
+        step_guideline = ("Break each stage into 3-8 detailed steps. Extract "
+                          "EVERY experimental procedure mentioned.")
+        completeness = "A typical research paper should yield 15-30 steps total"
+        if part:
+            task_scope = (
+                f"The text below is part {part[0]} of {part[1]} of the paper; "
+                "the parts are extracted separately and merged afterwards. "
+                "Extract only the stages and steps described in this part, "
+                "however few. Do not invent steps from other parts of the "
+                "paper.")
+            stage_guideline = (
+                "Use only the experimental phases this part describes (one is "
+                "fine). Name each after the phase of the whole study it "
+                "belongs to (e.g., \"Molecular Analysis\"), so the same phase "
+                "gets the same name in every part")
+            step_guideline = ("Extract EVERY experimental procedure in this "
+                              "part as a step; there is no minimum or maximum.")
+            completeness = ("Return no stages or steps for content this part "
+                            "does not contain")
+
+
         # Extract metadata to be placed directly in the prompt
         title = metadata.get('title', 'Not available') if metadata else 'Not available'
         doi = metadata.get('doi', 'Not available') if metadata else 'Not available'
@@ -75,7 +276,7 @@ class GeminiService:
         prompt = f"""
 CRITICAL: You are a scientific workflow extraction expert. Your response must contain ONLY a valid JSON object following the EXACT schema below. Do not include any explanations, thinking blocks, markdown formatting, or other text.
 
-TASK: Extract a detailed scientific workflow from the research paper. Break down ALL methodology into multiple stages and multiple steps per stage. The paper likely contains 15-30 individual experimental steps across 4-6 major stages.
+TASK: Extract a detailed scientific workflow from the research paper. {task_scope}
 
 REQUIRED JSON SCHEMA (respond with ONLY this structure):
 {{
@@ -137,8 +338,8 @@ REQUIRED JSON SCHEMA (respond with ONLY this structure):
 }}
 
 EXTRACTION GUIDELINES:
-1. **STAGES**: Identify 4-6 major experimental phases (e.g., "Construct Design", "Animal Generation", "Phenotypic Analysis", "Molecular Analysis")
-2. **STEPS**: Break each stage into 3-8 detailed steps. Extract EVERY experimental procedure mentioned.
+1. **STAGES**: {stage_guideline}
+2. **STEPS**: {step_guideline}
 3. **METADATA**: Capture ALL quantitative details:
    - Equipment models and manufacturers
    - Reagent concentrations and suppliers  
@@ -146,7 +347,7 @@ EXTRACTION GUIDELINES:
    - Time durations, temperatures, speeds
    - References to figures, tables, supplementary materials
 4. **CONNECTIONS**: Link steps logically showing experimental workflow
-5. **COMPLETENESS**: A typical research paper should yield 15-30 steps total
+5. **COMPLETENESS**: {completeness}
 
 RESEARCH PAPER TEXT:
 {paper_text}
@@ -158,47 +359,7 @@ RESPOND WITH ONLY THE JSON OBJECT - NO OTHER TEXT:"""
         """
         Extract JSON content from a response that might contain mixed content
         """
-        # First, try to find JSON in markdown code blocks
-        if "```json" in response_text:
-            start = response_text.find("```json") + 7
-            end = response_text.find("```", start)
-            if end != -1:
-                return response_text[start:end].strip()
-        
-        # Try to find JSON in generic code blocks
-        if response_text.startswith("```"):
-            lines = response_text.split('\n')
-            start_idx = 1
-            end_idx = len(lines) - 1
-            for i, line in enumerate(lines):
-                if line.strip().startswith('{'):
-                    start_idx = i
-                    break
-            for i in range(len(lines) - 1, -1, -1):
-                if lines[i].strip().endswith('}'):
-                    end_idx = i + 1
-                    break
-            return '\n'.join(lines[start_idx:end_idx])
-        
-        # Handle <thinking> tags or other content before JSON
-        if not response_text.strip().startswith('{'):
-            json_start = response_text.find('{')
-            if json_start != -1:
-                # Find the matching closing brace
-                brace_count = 0
-                json_end = json_start
-                for i in range(json_start, len(response_text)):
-                    if response_text[i] == '{':
-                        brace_count += 1
-                    elif response_text[i] == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            json_end = i + 1
-                            break
-                return response_text[json_start:json_end]
-        
-        # If it already looks like JSON, return as-is
-        return response_text.strip()
+        return json_codec.extract_json_object(response_text)
 
     def _parse_response(self, response_text: str) -> Dict[str, Any]:
         """
@@ -209,15 +370,12 @@ RESPOND WITH ONLY THE JSON OBJECT - NO OTHER TEXT:"""
             response_text = response_text.strip()
             logger.info(f"🧹 CLEANED RESPONSE TEXT LENGTH: {len(response_text)}")
 
-            # Extract JSON using improved method
-            json_content = self._extract_json_from_response(response_text)
-            logger.info("🔧 EXTRACTED JSON CONTENT")
+            logger.debug("📝 FINAL TEXT BEFORE JSON PARSE:")
+            logger.debug(f"First 500 chars: {response_text[:500]}...")
 
-            logger.info("📝 FINAL TEXT BEFORE JSON PARSE:")
-            logger.info(f"First 500 chars: {json_content[:500]}...")
-            
-            # Parse JSON
-            workflow_data = json.loads(json_content)
+            # Locate and parse the embedded JSON object in one pass
+            with metrics.stage_timer("json_parse"):
+                workflow_data = json_codec.parse_json_object(response_text)
             logger.info("✅ JSON PARSING SUCCESSFUL")
 
             # Validate structure - the workflow data should contain the necessary fields
@@ -232,7 +390,8 @@ RESPOND WITH ONLY THE JSON OBJECT - NO OTHER TEXT:"""
 
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON response from Gemini: {e}")
-            logger.error(f"Problematic text: {json_content[:1000] if 'json_content' in locals() else response_text[:1000]}...")
+            json_content = self._extract_json_from_response(response_text)
+            logger.error(f"Problematic text: {json_content[:1000]}...")
             return self._get_sample_workflow()
         except Exception as e:
             logger.error(f"Error parsing Gemini response: {e}")
@@ -245,6 +404,7 @@ RESPOND WITH ONLY THE JSON OBJECT - NO OTHER TEXT:"""
         logger.info("🎯 Using sample workflow (no API key or AI failed)")
         return {
             "success": True,
+            "fallback": True,
             "workflow": {
                 "paper_title": "Sample Research Paper: CRISPR/Cas9 Gene Editing Study",
                 "citation": {
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from pydantic import ValidationError
+
+import config
+from app.models.workflow import ProcessingStatus, Workflow
+from . import metrics
+from .pipeline_events import PipelineEvents
+from .workflow_generator import WorkflowGenerator
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue has no room for another upload"""
+
+
+class _Job:
+
+    def __init__(self, job_id: str, pdf_bytes: bytes, filename: str,
+                 content_hash: Optional[str]):
+        self.id = job_id
+        self.pdf_bytes: Optional[bytes] = pdf_bytes
+        self.filename = filename
+        self.content_hash = content_hash
+        self.status = ProcessingStatus(status="queued",
+                                       progress=0,
+                                       message="Waiting for a worker")
+        self.events = PipelineEvents()
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+
+class JobManager:
+    """
+    Runs workflow generation in the background.
+
+    Uploads are queued in a bounded asyncio queue and processed by a fixed
+    number of worker tasks, so the HTTP request returns immediately with a
+    job id. Finished jobs are kept for result_ttl seconds for polling.
+    """
+
+    def __init__(self,
+                 generator: WorkflowGenerator,
+                 workers: Optional[int] = None,
+                 queue_size: Optional[int] = None,
+                 result_ttl: Optional[float] = None):
+        self.generator = generator
+        self.workers = workers or config.JOB_WORKERS
+        self.queue_size = queue_size or config.JOB_QUEUE_SIZE
+        self.result_ttl = result_ttl or config.JOB_RESULT_TTL
+        self._jobs: Dict[str, _Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        metrics.IN_FLIGHT.labels(operation="job_queued").set_function(
+            self._queue.qsize)
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} workflow job workers")
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self,
+               pdf_bytes: bytes,
+               filename: str,
+               content_hash: Optional[str] = None) -> str:
+        """
+        Queue a PDF for workflow generation.
+
+        Args:
+            pdf_bytes: PDF file content as bytes
+            filename: Original filename
+            content_hash: Precomputed SHA-256 hex digest of pdf_bytes
+
+        Returns:
+            The job id to poll with get()
+
+        Raises:
+            JobQueueFull: If the queue is at capacity
+        """
+        if self._queue is None:
+            raise RuntimeError("JobManager has not been started")
+        self._purge_expired()
+
+        job = _Job(uuid.uuid4().hex, pdf_bytes, filename, content_hash)
+        try:
+            self._queue.put_nowait(job.id)
+        except asyncio.QueueFull:
+            raise JobQueueFull(
+                f"Job queue is full ({self.queue_size} pending)") from None
+        self._jobs[job.id] = job
+        job.events.emit("upload_received",
+                        filename=filename,
+                        bytes=len(pdf_bytes))
+        logger.info(f"Queued job {job.id} for {filename}")
+        return job.id
+
+    def get(self, job_id: str) -> Optional[ProcessingStatus]:
+        """Return the current status of a job, or None if unknown/expired"""
+        self._purge_expired()
+        job = self._jobs.get(job_id)
+        return job.status if job else None
+
+    def get_events(self, job_id: str) -> Optional[PipelineEvents]:
+        """Return the pipeline event log of a job, or None if unknown/expired"""
+        self._purge_expired()
+        job = self._jobs.get(job_id)
+        return job.events if job else None
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at and now - job.finished_at > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    with metrics.track_in_flight("job"):
+                        await self._run(job)
+            except Exception as e:
+                logger.error(f"Job worker {index} failed on {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: _Job) -> None:
+
+        def update(progress: int, message: str) -> None:
+            job.status = ProcessingStatus(status="processing",
+                                          progress=progress,
+                                          message=message)
+
+        update(5, "Processing started")
+        try:
+            result = await self.generator.generate_workflow_from_pdf(
+                pdf_bytes=job.pdf_bytes,
+                filename=job.filename,
+                content_hash=job.content_hash,
+                progress_callback=update,
+                events=job.events)
+
+            if result["success"]:
+                with metrics.stage_timer("validate"):
+                    workflow = Workflow.model_validate(result["workflow"])
+                job.status = ProcessingStatus(
+                    status="completed",
+                    progress=100,
+                    message="Workflow generated successfully",
+                    workflow=workflow)
+            else:
+                job.status = ProcessingStatus(status="failed",
+                                              progress=100,
+                                              message=result["error"])
+        except ValidationError as e:
+            logger.error(f"Job {job.id} produced an invalid workflow: {e}")
+            job.status = ProcessingStatus(
+                status="failed",
+                progress=100,
+                message="Generated workflow failed schema validation")
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job.status = ProcessingStatus(status="failed",
+                                          progress=100,
+                                          message=f"Pipeline error: {str(e)}")
+        except asyncio.CancelledError:
+            # Record the failure before the cancellation propagates, so the
+            # job does not stay "processing" forever
+            logger.error(f"Job {job.id} was cancelled")
+            job.status = ProcessingStatus(status="failed",
+                                          progress=100,
+                                          message="Pipeline cancelled")
+            raise
+        finally:
+            # Release the PDF as soon as it is no longer needed
+            job.pdf_bytes = None
+            job.finished_at = time.time()
+            job.events.emit(job.status.status, message=job.status.message)
+            job.events.close()
@@ -0,0 +1,117 @@
+import json
+import re
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # optional C-accelerated codec
+    orjson = None
+
+# Start of a JSON object: "{" followed by a quoted key (or an empty object)
+OBJECT_START_RE = re.compile(r'\{\s*(?:"|\})')
+
+# Tokens that matter for brace matching. String literals (with escapes)
+# are consumed whole by the regex engine, so braces inside them are skipped.
+_TOKEN_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}]', re.DOTALL)
+
+# The stdlib decoder's raw_decode finds where an embedded object ends
+_DECODER = json.JSONDecoder()
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to compact JSON text, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes, for HTTP response bodies"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def _object_start(text: str) -> int:
+    match = OBJECT_START_RE.search(text)
+    return match.start() if match else text.find("{")
+
+
+def extract_json_object(text: str) -> str:
+    """
+    Return the first complete JSON object embedded in an LLM response.
+
+    Handles markdown code fences, <thinking> blocks and any other text
+    around the object in a single linear pass. Braces inside string
+    literals, including escaped quotes, do not affect matching. If the
+    object is truncated the remainder of the text is returned so the
+    caller's parser reports the error.
+
+    Args:
+        text: Raw response text
+
+    Returns:
+        The JSON object text, or the stripped input if no object is found
+    """
+    start = _object_start(text)
+    if start == -1:
+        return text.strip()
+
+    # Valid JSON: let the C scanner find the end of the object
+    try:
+        _, end = _DECODER.raw_decode(text, start)
+        return text[start:end]
+    except ValueError:
+        pass
+
+    # Malformed JSON: match braces, skipping over string literals
+    depth = 0
+    for token in _TOKEN_RE.finditer(text, start):
+        value = token.group()
+        if value == "{":
+            depth += 1
+        elif value == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:token.end()]
+
+    return text[start:].strip()
+
+
+def parse_json_object(text: str) -> Any:
+    """
+    Locate and parse the first JSON object in an LLM response.
+
+    Equivalent to loads(extract_json_object(text)) but parses the payload
+    only once. In the common case the object runs up to the last "}" of
+    the response (only a closing fence follows), and that slice is handed
+    straight to the fast codec; otherwise the stdlib decoder parses the
+    object in place and ignores whatever follows it.
+
+    Args:
+        text: Raw response text
+
+    Returns:
+        The parsed object
+
+    Raises:
+        json.JSONDecodeError: If no valid JSON object is found
+    """
+    start = _object_start(text)
+    if start == -1:
+        raise json.JSONDecodeError("No JSON object in response", text, 0)
+
+    if orjson is not None:
+        try:
+            return orjson.loads(text[start:text.rfind("}") + 1])
+        except orjson.JSONDecodeError:
+            pass
+    return _DECODER.raw_decode(text, start)[0]
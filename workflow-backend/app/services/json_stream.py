@@ -0,0 +1,130 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .json_codec import OBJECT_START_RE
+
+logger = logging.getLogger(__name__)
+
+# Top-level workflow keys whose members are emitted as they complete
+WORKFLOW_SECTIONS = ("stages", "steps", "stageEdges", "stepEdges")
+
+
+class _Container:
+    __slots__ = ("kind", "parent_key", "start", "key")
+
+    def __init__(self, kind: str, parent_key: Optional[str], start: int):
+        self.kind = kind  # "{" or "["
+        self.parent_key = parent_key  # key this container sits under
+        self.start = start  # buffer offset of the opening bracket
+        self.key: Optional[str] = None  # current key (objects only)
+
+
+class IncrementalWorkflowParser:
+    """
+    Incremental parser for a streamed workflow JSON response.
+
+    Feed response chunks as they arrive; every stage, step or edge object
+    is returned as soon as its closing brace has been received, well
+    before the full response is complete. The scanner tracks string
+    literals and escapes, so braces inside descriptions are ignored. Text
+    before the response object (markdown fences, preambles, even ones
+    containing stray braces) is skipped: like json_codec, the object is
+    taken to start at the first "{" followed by a quoted key.
+
+    The parser only surfaces items early; the complete response is still
+    parsed and validated as a whole once streaming finishes.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.done = False
+        self._pos = 0
+        self._stack: List[_Container] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+
+    def feed(self,
+             chunk: str) -> List[Tuple[str, Optional[str], Dict[str, Any]]]:
+        """
+        Consume the next response chunk.
+
+        Args:
+            chunk: Newly received response text
+
+        Returns:
+            Completed items as (section, id, object) tuples, where id is the
+            stage/step id for "stages"/"steps" and None for edge lists
+        """
+        self.buffer += chunk
+        items = []
+        buf = self.buffer
+        stack = self._stack
+        i = self._pos
+        end = len(buf)
+
+        while i < end and not self.done:
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._last_string = buf[self._string_start + 1:i]
+            elif not stack:
+                match = OBJECT_START_RE.search(buf, i)
+                if match is None:
+                    # Keep a trailing "{" whose key has not arrived yet
+                    brace = buf.rfind("{", i)
+                    if brace != -1 and not buf[brace + 1:].strip():
+                        i = brace
+                    else:
+                        i = end
+                    break
+                stack.append(_Container("{", None, match.start()))
+                # Resume at the key's opening quote (or the closing brace)
+                i = match.end() - 1
+                continue
+            elif c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":":
+                if stack[-1].kind == "{":
+                    stack[-1].key = self._last_string
+            elif c == ",":
+                if stack[-1].kind == "{":
+                    stack[-1].key = None
+            elif c == "{" or c == "[":
+                parent = stack[-1]
+                parent_key = (parent.key
+                              if parent.kind == "{" else parent.parent_key)
+                stack.append(_Container(c, parent_key, i))
+            elif c == "}" or c == "]":
+                closed = stack.pop()
+                if not stack:
+                    self.done = True
+                elif len(stack) == 2 and closed.kind == "{":
+                    item = self._complete_item(stack[-1], closed, i)
+                    if item is not None:
+                        items.append(item)
+            i += 1
+
+        self._pos = i
+        return items
+
+    def _complete_item(
+            self, section: _Container, closed: _Container,
+            end: int) -> Optional[Tuple[str, Optional[str], Dict[str, Any]]]:
+        if section.parent_key not in WORKFLOW_SECTIONS:
+            return None
+        try:
+            obj = json.loads(self.buffer[closed.start:end + 1])
+        except ValueError as e:
+            logger.warning(f"Skipping unparsable streamed item: {e}")
+            return None
+        item_id = closed.parent_key if section.kind == "{" else None
+        return section.parent_key, item_id, obj
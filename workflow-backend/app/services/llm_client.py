@@ -0,0 +1,217 @@
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Optional
+
+import config
+from . import metrics
+from .llm_scheduler import LLMScheduler, PRIORITY_INTERACTIVE
+from .prompt_reducer import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a streamed response handed over from a worker thread
+_STREAM_DONE = object()
+
+
+def _chunk_text(chunk: Any) -> str:
+    """Text of a streamed chunk; chunks without text parts yield ''"""
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+class AsyncLLMClient:
+    """
+    Non-blocking, concurrency-limited wrapper around a Gemini model.
+
+    Uses the SDK's native generate_content_async when available and falls
+    back to running the blocking generate_content in a bounded thread pool.
+    At most max_in_flight calls are outstanding at once; further callers
+    wait on a semaphore without blocking the event loop. With a scheduler,
+    every attempt is first admitted against the shared rate limits and
+    429/5xx failures are retried with backoff.
+    """
+
+    def __init__(self,
+                 model: Any,
+                 max_in_flight: Optional[int] = None,
+                 use_native_async: bool = True,
+                 scheduler: Optional[LLMScheduler] = None):
+        self.model = model
+        self.scheduler = scheduler
+        self.max_in_flight = max_in_flight or config.GEMINI_MAX_IN_FLIGHT
+        self.native_async = use_native_async and hasattr(
+            model, "generate_content_async")
+        self.in_flight = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_in_flight, thread_name_prefix="gemini")
+        return self._executor
+
+    async def generate_content(self,
+                               prompt: str,
+                               priority: int = PRIORITY_INTERACTIVE,
+                               **kwargs: Any) -> Any:
+        """
+        Generate content for a prompt without blocking the event loop.
+
+        Args:
+            prompt: Prompt text
+            priority: Scheduler priority, lower is served first
+            **kwargs: Extra arguments forwarded to generate_content
+
+        Returns:
+            The SDK response object
+        """
+        if self.scheduler is None:
+            return await self._generate_limited(prompt, **kwargs)
+        return await self.scheduler.run(
+            lambda: self._generate_limited(prompt, **kwargs),
+            estimate_tokens(prompt), priority)
+
+    async def _generate_limited(self, prompt: str, **kwargs: Any) -> Any:
+        waited = time.perf_counter()
+        async with self.semaphore:
+            metrics.observe_stage("llm_queue_wait",
+                                  time.perf_counter() - waited)
+            self.in_flight += 1
+            try:
+                with metrics.track_in_flight("llm_call"), \
+                        metrics.stage_timer("llm_call"):
+                    return await self._generate(prompt, **kwargs)
+            finally:
+                self.in_flight -= 1
+
+    async def _generate(self, prompt: str, **kwargs: Any) -> Any:
+        if self.native_async:
+            return await self.model.generate_content_async(prompt, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self.model.generate_content, prompt, **kwargs)
+        return await loop.run_in_executor(self._get_executor(), call)
+
+    async def stream_content(self,
+                             prompt: str,
+                             priority: int = PRIORITY_INTERACTIVE,
+                             **kwargs: Any) -> AsyncIterator[str]:
+        """
+        Stream the response text for a prompt as chunks arrive.
+
+        The call counts against max_in_flight until the stream is exhausted.
+        Time to the first chunk is recorded as the "llm_first_byte" stage.
+        A failed call is only retried if nothing was yielded yet.
+
+        Args:
+            prompt: Prompt text
+            priority: Scheduler priority, lower is served first
+            **kwargs: Extra arguments forwarded to generate_content
+
+        Yields:
+            Response text chunks in order
+        """
+        if self.scheduler is None:
+            async for text in self._stream_limited(prompt, **kwargs):
+                yield text
+            return
+
+        tokens = estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            await self.scheduler.acquire(tokens, priority)
+            started_output = False
+            try:
+                async for text in self._stream_limited(prompt, **kwargs):
+                    started_output = True
+                    yield text
+                return
+            except Exception as e:
+                if started_output or not self.scheduler.should_retry(
+                        e, attempt):
+                    raise
+                await self.scheduler.backoff(e, attempt)
+                attempt += 1
+
+    async def _stream_limited(self, prompt: str,
+                              **kwargs: Any) -> AsyncIterator[str]:
+        waited = time.perf_counter()
+        async with self.semaphore:
+            started = time.perf_counter()
+            metrics.observe_stage("llm_queue_wait", started - waited)
+            self.in_flight += 1
+            try:
+                with metrics.track_in_flight("llm_call"), \
+                        metrics.stage_timer("llm_call"):
+                    first = True
+                    async for text in self._stream(prompt, **kwargs):
+                        if first:
+                            first = False
+                            metrics.observe_stage(
+                                "llm_first_byte",
+                                time.perf_counter() - started)
+                        yield text
+            finally:
+                self.in_flight -= 1
+
+    async def _stream(self, prompt: str, **kwargs: Any) -> AsyncIterator[str]:
+        if self.native_async:
+            response = await self.model.generate_content_async(prompt,
+                                                               stream=True,
+                                                               **kwargs)
+            async for chunk in response:
+                text = _chunk_text(chunk)
+                if text:
+                    yield text
+            return
+
+        async for text in self._stream_in_thread(prompt, **kwargs):
+            yield text
+
+    async def _stream_in_thread(self, prompt: str,
+                                **kwargs: Any) -> AsyncIterator[str]:
+        """Drive the blocking streaming iterator from the thread pool"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def produce() -> None:
+            try:
+                for chunk in self.model.generate_content(prompt,
+                                                         stream=True,
+                                                         **kwargs):
+                    loop.call_soon_threadsafe(queue.put_nowait,
+                                              _chunk_text(chunk))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _STREAM_DONE)
+
+        producer = loop.run_in_executor(self._get_executor(), produce)
+        while True:
+            item = await queue.get()
+            if item is _STREAM_DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if item:
+                yield item
+        await producer
+
+    def close(self) -> None:
+        """Release the fallback thread pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,207 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+import config
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Lower values are admitted first; equal priorities are served FIFO
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# HTTP status codes worth retrying: quota exhausted and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute.
+
+    The capacity is one minute's worth of tokens, so a quiet bucket allows
+    a burst up to the per-minute budget. A rate of 0 means unlimited.
+    """
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until amount tokens are available (0 if available now)"""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        if self.rate:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the server reports quota exhaustion"""
+        if self.rate:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of an API error (google.api_core or httpx style)"""
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+class LLMScheduler:
+    """
+    Shared admission control for LLM calls.
+
+    Callers wait in a priority queue (FIFO within a priority) until both
+    the requests-per-minute and tokens-per-minute buckets can cover their
+    call, so bursts are smoothed to the quota instead of being rejected
+    by the API. Calls that fail with 429 or a 5xx status are retried with
+    full-jitter exponential backoff; a 429 also empties the request bucket
+    so every queued caller backs off together.
+    """
+
+    def __init__(self,
+                 requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None,
+                 max_retries: Optional[int] = None,
+                 base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None):
+        if requests_per_minute is None:
+            requests_per_minute = config.GEMINI_REQUESTS_PER_MINUTE
+        if tokens_per_minute is None:
+            tokens_per_minute = config.GEMINI_TOKENS_PER_MINUTE
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = (config.GEMINI_MAX_RETRIES
+                            if max_retries is None else max_retries)
+        self.base_delay = base_delay or config.GEMINI_RETRY_BASE_DELAY
+        self.max_delay = max_delay or config.GEMINI_RETRY_MAX_DELAY
+        self._waiters: List[Tuple[int, int, float]] = []
+        self._sequence = itertools.count()
+        self._changed: Optional[asyncio.Event] = None
+
+    @property
+    def queued(self) -> int:
+        """Number of callers waiting for admission"""
+        return len(self._waiters)
+
+    def _notify(self) -> None:
+        if self._changed is not None:
+            self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def acquire(self,
+                      tokens: float,
+                      priority: int = PRIORITY_INTERACTIVE) -> None:
+        """
+        Wait until a call estimated at tokens may be sent.
+
+        Args:
+            tokens: Estimated tokens the call consumes
+            priority: Queue priority, lower is served first
+        """
+        started = time.perf_counter()
+        entry = (priority, next(self._sequence), tokens)
+        heapq.heappush(self._waiters, entry)
+        if self._changed is None:
+            self._changed = asyncio.Event()
+
+        try:
+            while True:
+                changed = self._changed
+                delay = None
+                if self._waiters[0] is entry:
+                    delay = max(self.requests.delay(1),
+                                self.tokens.delay(tokens))
+                    if delay <= 0:
+                        heapq.heappop(self._waiters)
+                        self.requests.take(1)
+                        self.tokens.take(tokens)
+                        self._notify()
+                        return
+                try:
+                    await asyncio.wait_for(changed.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            # Cancelled while queued: leave the queue and let the next go
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._notify()
+            raise
+        finally:
+            metrics.observe_stage("llm_rate_limit_wait",
+                                  time.perf_counter() - started)
+
+    def should_retry(self, exc: BaseException, attempt: int) -> bool:
+        """Whether a failed call (0-based attempt) should be retried"""
+        return (attempt < self.max_retries
+                and _status_code(exc) in RETRYABLE_STATUS)
+
+    async def backoff(self, exc: BaseException, attempt: int) -> None:
+        """Sleep before retry number attempt + 1"""
+        status = _status_code(exc)
+        if status == 429:
+            self.requests.drain()
+        delay = random.uniform(
+            0, min(self.max_delay, self.base_delay * 2**attempt))
+        metrics.LLM_RETRIES.labels(status=str(status)).inc()
+        logger.warning(f"LLM call failed with {status}, retry "
+                       f"{attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    async def run(self,
+                  call: Callable[[], Awaitable[Any]],
+                  tokens: float,
+                  priority: int = PRIORITY_INTERACTIVE) -> Any:
+        """
+        Run call() under the quota, retrying retryable failures.
+
+        Args:
+            call: Zero-argument coroutine function making one API request
+            tokens: Estimated tokens per attempt
+            priority: Queue priority, lower is served first
+
+        Returns:
+            The result of the first successful attempt
+        """
+        attempt = 0
+        while True:
+            await self.acquire(tokens, priority)
+            try:
+                return await call()
+            except Exception as e:
+                if not self.should_retry(e, attempt):
+                    raise
+                await self.backoff(e, attempt)
+                attempt += 1
+
+
+# Shared by every Gemini client so all calls draw on one quota
+gemini_scheduler = LLMScheduler()
+metrics.IN_FLIGHT.labels(operation="llm_queued").set_function(
+    lambda: gemini_scheduler.queued)
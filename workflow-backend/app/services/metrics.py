@@ -0,0 +1,117 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge,
+                               Histogram, generate_latest)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Stage latencies span sub-millisecond JSON parsing to multi-minute LLM calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+STAGE_SECONDS = Histogram("workflow_stage_duration_seconds",
+                          "Time spent in each pipeline stage", ["stage"],
+                          buckets=LATENCY_BUCKETS)
+
+HTTP_REQUEST_SECONDS = Histogram("workflow_http_request_duration_seconds",
+                                 "HTTP request latency",
+                                 ["method", "route", "status"],
+                                 buckets=LATENCY_BUCKETS)
+
+IN_FLIGHT = Gauge("workflow_in_flight", "Operations currently in progress",
+                  ["operation"])
+
+LLM_RETRIES = Counter("workflow_llm_retries_total",
+                      "LLM calls retried after a 429 or 5xx response",
+                      ["status"])
+
+PARSER_CHOICES = Counter("workflow_parser_choices_total",
+                         "Parsers picked by the PDF probe, and why",
+                         ["parser", "reason"])
+
+NORMALIZED_CHARS = Counter("workflow_normalized_chars_removed_total",
+                           "Characters removed from extracted text by kind",
+                           ["kind"])
+
+PIPELINE_RESULTS = Counter("workflow_pipeline_results_total",
+                           "Finished workflow generations by outcome",
+                           ["result"])
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Record the duration of the enclosed block under the given stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() -
+                                                  started)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Record a stage duration measured elsewhere (e.g. a worker process)"""
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+
+@contextmanager
+def track_in_flight(operation: str) -> Iterator[None]:
+    """Count the enclosed block as an in-progress operation"""
+    gauge = IN_FLIGHT.labels(operation=operation)
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
+
+
+class _CacheCollector:
+    """Exports the counters of registered caches at scrape time"""
+
+    def __init__(self):
+        self.caches: Dict[str, Any] = {}
+
+    def collect(self):
+        hits = CounterMetricFamily("workflow_cache_hits", "Cache hits",
+                                   labels=["cache"])
+        misses = CounterMetricFamily("workflow_cache_misses", "Cache misses",
+                                     labels=["cache"])
+        evictions = CounterMetricFamily("workflow_cache_evictions",
+                                        "Entries evicted from the cache",
+                                        labels=["cache"])
+        entries = GaugeMetricFamily("workflow_cache_entries",
+                                    "Entries currently cached",
+                                    labels=["cache"])
+        size = GaugeMetricFamily("workflow_cache_bytes",
+                                 "Bytes currently cached",
+                                 labels=["cache"])
+        for name, cache in list(self.caches.items()):
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            evictions.add_metric([name], stats["evictions"])
+            entries.add_metric([name], stats["entries"])
+            size.add_metric([name], stats["bytes"])
+        return [hits, misses, evictions, entries, size]
+
+
+_cache_collector = _CacheCollector()
+REGISTRY.register(_cache_collector)
+
+
+def register_cache(name: str, cache: Any) -> None:
+    """
+    Export a cache's hit/miss/eviction counters and size.
+
+    Args:
+        name: Value of the "cache" label
+        cache: Object with a stats() method returning hits, misses,
+            evictions, entries and bytes (e.g. SQLiteCache)
+    """
+    _cache_collector.caches[name] = cache
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Return the Prometheus exposition body and its content type"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import httpx
+
+import config
+from . import metrics
+from .work_store import WorkStore
+
+logger = logging.getLogger(__name__)
+
+# Work fields the citation graph needs; keeps responses small
+WORK_FIELDS = ("id", "display_name", "publication_year", "cited_by_count",
+               "referenced_works", "updated_date")
+
+# Fields fetched to check whether a stored work changed upstream
+REVALIDATE_FIELDS = ("id", "updated_date")
+
+
+def short_id(work_id: str) -> str:
+    """"https://openalex.org/W123" -> "W123" (filters take the short form)"""
+    return work_id.rstrip("/").rsplit("/", 1)[-1]
+
+
+class OpenAlexClient:
+    """
+    Pooled, concurrency-limited client for the OpenAlex works API.
+
+    One httpx.AsyncClient (and its connection pool) is shared for the
+    lifetime of the app. Works are resolved in batches with
+    "ids.openalex:W1|W2|..." filter queries and citing works with one
+    "cites:W1" query per id, with at most max_concurrency requests
+    outstanding.
+
+    With a WorkStore, lookups read through the local store: fresh works,
+    citing lists and title searches are served locally, and stale works
+    are revalidated with a batched id/updated_date query so only works
+    that changed upstream are downloaded again.
+    """
+
+    def __init__(self,
+                 base_url: Optional[str] = None,
+                 batch_size: Optional[int] = None,
+                 max_concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 store: Optional[WorkStore] = None):
+        self.base_url = (base_url or config.OPENALEX_BASE_URL).rstrip("/")
+        self.batch_size = batch_size or config.OPENALEX_BATCH_SIZE
+        self.max_concurrency = (max_concurrency
+                                or config.OPENALEX_MAX_CONCURRENCY)
+        self.timeout = timeout or config.OPENALEX_TIMEOUT
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.store = store
+        if store is not None:
+            metrics.register_cache("openalex_works", store)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the running event loop
+        if self._client is None:
+            limits = httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency)
+            self._client = httpx.AsyncClient(timeout=self.timeout,
+                                             limits=limits)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def close(self) -> None:
+        """Close the pooled connections"""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    async def _get_works(self,
+                         params: Dict[str, Any],
+                         fields=WORK_FIELDS) -> List[Dict[str, Any]]:
+        params = {"select": ",".join(fields), **params}
+        if config.OPENALEX_MAILTO:
+            params["mailto"] = config.OPENALEX_MAILTO
+        client = self.client
+        async with self._semaphore:
+            with metrics.stage_timer("openalex_request"):
+                response = await client.get(f"{self.base_url}/works",
+                                            params=params)
+        response.raise_for_status()
+        return response.json().get("results", [])
+
+    def _batches(self, ids: List[str]) -> List[List[str]]:
+        return [
+            ids[i:i + self.batch_size]
+            for i in range(0, len(ids), self.batch_size)
+        ]
+
+    async def search(self, title: str) -> Optional[Dict[str, Any]]:
+        """Return the best-matching work for a title, or None"""
+        if self.store is not None:
+            work_id = self.store.get_search(title)
+            if work_id is not None:
+                works = await self.get_works([work_id])
+                if works:
+                    return next(iter(works.values()))
+
+        results = await self._get_works({"search": title, "per-page": 1})
+        if not results:
+            return None
+        if self.store is not None:
+            self.store.put_works(results[:1])
+            self.store.put_search(title, short_id(results[0]["id"]))
+        return results[0]
+
+    async def _fetch_citing(self, work_id: str,
+                            limit: int) -> List[Dict[str, Any]]:
+        return await self._get_works({
+            "filter": f"cites:{work_id}",
+            "sort": "cited_by_count:desc",
+            "per-page": limit
+        })
+
+    async def get_citing(self, work_ids: Iterable[str],
+                         limit: int) -> List[Dict[str, Any]]:
+        """
+        Fetch up to limit works citing each of work_ids, most cited first.
+
+        Each id gets its own "cites:W1" query (limit is at most OpenAlex's
+        page size of 200), so a popular work cannot crowd the others out
+        and every stored citing list is the complete top limit for its
+        id. Lists already in the store are served from it, the works
+        themselves via get_works().
+
+        Returns:
+            The citing works, each once, most cited first; callers
+            attribute them to the cited works through referenced_works
+        """
+        ids = list(dict.fromkeys(short_id(work_id) for work_id in work_ids))
+        stored = (self.store.get_citing(ids, limit)
+                  if self.store is not None else {})
+        remaining = [work_id for work_id in ids if work_id not in stored]
+        fetched = await asyncio.gather(
+            *(self._fetch_citing(work_id, limit) for work_id in remaining))
+        works = {
+            work["id"]: work
+            for citing in fetched for work in citing
+        }
+        if self.store is not None and remaining:
+            self.store.put_works(list(works.values()))
+            self.store.put_citing(
+                {
+                    work_id: [work["id"] for work in citing]
+                    for work_id, citing in zip(remaining, fetched)
+                }, limit)
+
+        wanted = [
+            citing_id for citing_ids in stored.values()
+            for citing_id in citing_ids if citing_id not in works
+        ]
+        if wanted:
+            works.update(await self.get_works(wanted))
+        return sorted(works.values(),
+                      key=lambda work: -(work.get("cited_by_count") or 0))
+
+    async def _fetch_works(self, ids: List[str],
+                           fields=WORK_FIELDS) -> List[Dict[str, Any]]:
+        results = await asyncio.gather(*(self._get_works(
+            {
+                "filter": "ids.openalex:" + "|".join(batch),
+                "per-page": len(batch)
+            }, fields) for batch in self._batches(ids)))
+        return [work for batch in results for work in batch]
+
+    async def _revalidate(self, stale: Dict[str, Dict[str, Any]]) -> Set[str]:
+        """
+        Check stale works against OpenAlex's updated_date in batched
+        id-only queries.
+
+        Returns:
+            Short ids of the works that have not changed
+        """
+        current = await self._fetch_works(list(stale), REVALIDATE_FIELDS)
+        unchanged = {
+            short_id(work["id"])
+            for work in current if work.get("updated_date") and
+            stale.get(short_id(work["id"]), {}).get("updated_date") ==
+            work["updated_date"]
+        }
+        self.store.touch(unchanged)
+        return unchanged
+
+    async def get_works(
+            self, work_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch works by OpenAlex id in concurrent batched filter queries.
+
+        Fresh works in the store are not requested; stale ones are
+        revalidated first (concurrently with fetching unknown ids) and
+        only the changed ones are downloaded again.
+
+        Args:
+            work_ids: Full or short OpenAlex work ids
+
+        Returns:
+            Dict mapping the full work id to the work; ids OpenAlex does
+            not return are omitted
+        """
+        ids = list(dict.fromkeys(short_id(work_id) for work_id in work_ids))
+        if self.store is None:
+            works = await self._fetch_works(ids)
+            return {work["id"]: work for work in works}
+
+        found, stale = self.store.get_works(ids)
+        missing = [
+            work_id for work_id in ids
+            if work_id not in found and work_id not in stale
+        ]
+        unchanged, fetched = await asyncio.gather(self._revalidate(stale),
+                                                  self._fetch_works(missing))
+        found.update({work_id: stale[work_id] for work_id in unchanged})
+        changed = [work_id for work_id in stale if work_id not in unchanged]
+        if changed:
+            fetched += await self._fetch_works(changed)
+        self.store.put_works(fetched)
+
+        works = list(found.values()) + fetched
+        return {work["id"]: work for work in works}
+
+
+# Shared client for the paper-graph endpoint
+openalex_client = OpenAlexClient(store=WorkStore(
+    os.path.join(config.CACHE_DIR, "openalex.sqlite3"),
+    max_works=config.OPENALEX_STORE_MAX_WORKS,
+    ttl=config.OPENALEX_STORE_TTL) if config.OPENALEX_STORE_ENABLED else None)
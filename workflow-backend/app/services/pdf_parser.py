@@ -1,10 +1,25 @@
+import asyncio
+import io
+import logging
 import os
+import signal
 import tempfile
-import logging
-from typing import Dict, List, Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 import pymupdf4llm
 import PyPDF2
 import re
+import time
+
+try:
+    import pymupdf
+except ImportError:  # PyMuPDF < 1.24.3 only ships the legacy name
+    import fitz as pymupdf
+
+import config
+from . import metrics
+from .pdf_pool import extraction_pool
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +27,9 @@ logger = logging.getLogger(__name__)
 async def extract_text_from_pdf(pdf_path: str) -> Optional[str]:
     """
     Extract text from PDF using multiple parsers with fallback.
+
+    Parsing runs in the extraction process pool so the event loop stays
+    responsive while large documents are converted.
     
     Args:
         pdf_path: Path to the PDF file
@@ -19,52 +37,303 @@ async def extract_text_from_pdf(pdf_path: str) -> Optional[str]:
     Returns:
         Extracted text content or None if extraction fails
     """
-    # Try Method 1: pymupdf4llm
     try:
-        logger.info(f"Trying pymupdf4llm for {pdf_path}")
-        text_content = pymupdf4llm.to_markdown(pdf_path)
+        return await extraction_pool.run(_extract_text_sync, pdf_path)
+    except Exception as e:
+        logger.error(f"PDF extraction job failed for {pdf_path}: {e!r}")
+        return None
 
-        if text_content and text_content.strip():
-            logger.info(
-                f"✅ pymupdf4llm extracted {len(text_content)} characters")
-            return text_content
-        else:
-            logger.warning("pymupdf4llm returned empty content")
 
-    except Exception as e:
-        logger.warning(f"pymupdf4llm failed: {str(e)}")
+class ParserTimeout(Exception):
+    """Raised inside a parser that overran its time budget"""
+
 
-    # Try Method 2: PyPDF2
+@contextmanager
+def _time_budget(seconds: float) -> Iterator[None]:
+    """
+    Interrupt the enclosed parser call after seconds with ParserTimeout.
+
+    Uses SIGALRM, so it only takes effect in a process's main thread, which
+    is where extraction pool jobs run; elsewhere the block runs unbounded
+    and PDF_JOB_TIMEOUT remains the backstop.
+    """
+    if (not seconds or not hasattr(signal, "SIGALRM") or
+            threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def expire(signum, frame):
+        raise ParserTimeout(f"exceeded its {seconds}s budget")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
     try:
-        logger.info(f"Trying PyPDF2 for {pdf_path}")
-        text_content = ""
-
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-
-            for page_num, page in enumerate(pdf_reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_content += page_text + "\n"
-                except Exception as page_error:
-                    logger.warning(
-                        f"Error extracting page {page_num}: {page_error}")
-                    continue
-
-        if text_content and text_content.strip():
-            cleaned_text = _clean_text(text_content)
-            logger.info(f"✅ PyPDF2 extracted {len(cleaned_text)} characters")
-            return cleaned_text
-        else:
-            logger.warning("PyPDF2 returned empty content")
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _garbled_ratio(text: str) -> float:
+    """Share of non-space characters that are undecodable or control chars"""
+    visible = [char for char in text if not char.isspace()]
+    if not visible:
+        return 0.0
+    # U+FFFD replacement chars and private-use glyphs mean missing ToUnicode
+    bad = sum(1 for char in visible if char == "\ufffd" or
+              "\ue000" <= char <= "\uf8ff" or ord(char) < 32)
+    return bad / len(visible)
+
+
+def _probe_document(doc) -> Dict[str, Any]:
+    """
+    Pick a parser for an opened document from a few sample pages.
+
+    Checks the page count, whether pages carry a text layer at all and
+    whether that text decodes cleanly, all of which cost milliseconds,
+    before committing to a parser that may take minutes.
+
+    Args:
+        doc: PyMuPDF Document (None if it failed to open)
+
+    Returns:
+        Dict with the chosen "parser", the "reason" and the measurements
+        it was based on
+    """
+    if doc is None:
+        return {"parser": "pypdf2", "reason": "pymupdf_open_failed",
+                "pages": 0}
+
+    pages = doc.page_count
+    count = min(pages, config.PDF_PROBE_SAMPLE_PAGES)
+    # Spread the samples so a scanned appendix or cover is not decisive
+    sample = sorted({i * pages // count for i in range(count)}) if count else []
+    chars = 0
+    fonts = set()
+    type3 = set()
+    text = []
+    for number in sample:
+        page = doc[number]
+        page_text = page.get_text("text")
+        chars += len(page_text.strip())
+        text.append(page_text)
+        for font in page.get_fonts():
+            fonts.add(font[0])
+            if font[2] == "Type3":
+                type3.add(font[0])
+
+    probe = {
+        "pages": pages,
+        "sampled_pages": len(sample),
+        "chars_per_page": round(chars / len(sample)) if sample else 0,
+        "garbled_ratio": round(_garbled_ratio("".join(text)), 4),
+        "fonts": len(fonts),
+        "type3_fonts": len(type3)
+    }
+    if not sample or probe["chars_per_page"] < config.PDF_PROBE_MIN_CHARS:
+        parser, reason = "pypdf2", "no_text_layer"
+    elif probe["garbled_ratio"] > config.PDF_PROBE_MAX_GARBLED_RATIO:
+        parser, reason = "pypdf2", "garbled_text_layer"
+    elif fonts and len(type3) == len(fonts):
+        parser, reason = "pypdf2", "type3_fonts_only"
+    elif pages > config.PDF_PYMUPDF4LLM_MAX_PAGES:
+        parser, reason = "pypdf2", "page_count"
+    else:
+        parser, reason = "pymupdf4llm", "healthy_text_layer"
+    return {"parser": parser, "reason": reason, **probe}
+
+
+def _probe_with_budget(doc) -> Dict[str, Any]:
+    """
+    Probe under PDF_PROBE_BUDGET; a document too slow to sample goes to
+    PyPDF2
+    """
+    if doc is None:
+        return _probe_document(None)
+    try:
+        with _time_budget(config.PDF_PROBE_BUDGET):
+            return _probe_document(doc)
+    except ParserTimeout:
+        return {"parser": "pypdf2", "reason": "probe_timeout",
+                "pages": doc.page_count}
+
+
+def _should_shard(probe: Dict[str, Any]) -> bool:
+    """Whether a probed document is converted in page-range shards"""
+    return (config.PDF_SHARD_PAGES > 0
+            and probe["reason"] in ("healthy_text_layer", "page_count")
+            and probe["pages"] >= max(config.PDF_SHARD_MIN_PAGES,
+                                      config.PDF_SHARD_PAGES + 1))
+
 
+def _extract_text_sync(pdf_path: str) -> Optional[str]:
+    """
+    Run the parser fallback chain on a PDF file (executes in a worker process)
+    """
+    with open(pdf_path, 'rb') as file:
+        pdf_bytes = file.read()
+    result = _extract_from_bytes_sync(pdf_bytes, pdf_path)
+    return result["text"] if result else None
+
+
+def _extract_from_bytes_sync(
+        pdf_bytes: bytes,
+        filename: str,
+        probe: Optional[Dict[str, Any]] = None,
+        allow_shards: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Probe a PDF and run the parser fallback chain on its in-memory bytes
+    (executes in a worker process).
+
+    The document is opened once from the buffer and every parser reads
+    from that same memory, so nothing is written to or re-read from disk.
+    The probe runs here too, under its own time budget, so a pathological
+    PDF never ties up the API process. The result carries the "probe" and
+    per-attempt "timings" in seconds, since metrics recorded in a worker
+    process would not reach the API process.
+
+    Args:
+        pdf_bytes: PDF file bytes
+        filename: Original filename for logging
+        probe: Result of an earlier probe of the PDF; probed here if None
+        allow_shards: Stop after the probe if the document should be
+            converted in shards, returning only "shard", "probe" and
+            "timings"
+    """
+    timings: Dict[str, float] = {}
+    doc = None
+    started = time.perf_counter()
+    try:
+        doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
     except Exception as e:
-        logger.warning(f"PyPDF2 failed: {str(e)}")
+        logger.warning(f"PyMuPDF could not open {filename}: {str(e)}")
+    timings["pdf_open"] = time.perf_counter() - started
 
-    # Try Method 3: Simple text fallback
     try:
-        logger.info(f"Trying simple text extraction for {pdf_path}")
+        if probe is None:
+            started = time.perf_counter()
+            probe = _probe_with_budget(doc)
+            timings["pdf_probe"] = time.perf_counter() - started
+        if allow_shards and _should_shard(probe):
+            return {"shard": True, "probe": probe, "timings": timings}
+        result = _run_parser_chain(doc, pdf_bytes, filename, timings, probe)
+        if result is not None:
+            result["timings"] = timings
+            result["probe"] = probe
+        return result
+    finally:
+        if doc is not None:
+            doc.close()
+
+
+def _parse_pymupdf4llm(doc, pdf_bytes: bytes,
+                       filename: str) -> Optional[Dict[str, Any]]:
+    if doc is None:
+        raise ValueError("document could not be opened")
+    logger.info(f"Trying pymupdf4llm for {filename}")
+    with _time_budget(config.PDF_PYMUPDF4LLM_BUDGET):
+        chunks = pymupdf4llm.to_markdown(doc, page_chunks=True)
+    page_texts = [chunk["text"] for chunk in chunks]
+
+    if any(text.strip() for text in page_texts):
+        logger.info(f"✅ pymupdf4llm extracted "
+                    f"{sum(map(len, page_texts))} characters")
+        return {
+            "page_texts": page_texts,
+            "parser": "pymupdf4llm",
+            "pages": doc.page_count
+        }
+    logger.warning("pymupdf4llm returned empty content")
+    return None
+
+
+def _parse_pypdf2(doc, pdf_bytes: bytes,
+                  filename: str) -> Optional[Dict[str, Any]]:
+    logger.info(f"Trying PyPDF2 for {filename}")
+    with _time_budget(config.PDF_PYPDF2_BUDGET):
+        # BytesIO shares the existing buffer rather than copying it
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        page_texts = _pypdf2_pages(pdf_reader, 0, len(pdf_reader.pages))
+
+    if any(text.strip() for text in page_texts):
+        logger.info(f"✅ PyPDF2 extracted "
+                    f"{sum(map(len, page_texts))} characters")
+        return {
+            "page_texts": page_texts,
+            "parser": "pypdf2",
+            "pages": len(pdf_reader.pages)
+        }
+    logger.warning("PyPDF2 returned empty content")
+    return None
+
+
+_PARSERS = {"pymupdf4llm": _parse_pymupdf4llm, "pypdf2": _parse_pypdf2}
+
+
+def _run_parser_chain(
+        doc,
+        pdf_bytes: bytes,
+        filename: str,
+        timings: Optional[Dict[str, float]] = None,
+        probe: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Try each parser in turn on an already opened document.
+
+    The probe's parser goes first and the other one is the fallback
+    (pymupdf4llm is skipped if PyMuPDF could not open the document or it
+    has no text layer). Each attempt is cut off after its
+    PDF_<PARSER>_BUDGET seconds.
+
+    Args:
+        doc: PyMuPDF Document opened from pdf_bytes (None if it failed to open)
+        pdf_bytes: The raw PDF buffer backing doc
+        filename: Original filename for logging
+        timings: Optional dict receiving each attempt's duration in seconds,
+            keyed "parse_<parser>"
+        probe: Result of _probe_document(); probed here if None
+
+    Returns:
+        Dict with the extracted and normalized "text", the "parser" that
+        produced it, the document's "pages" and "normalization" statistics,
+        or None if extraction fails
+    """
+    if timings is None:
+        timings = {}
+    if probe is None:
+        probe = _probe_document(doc)
+
+    order = ["pymupdf4llm", "pypdf2"]
+    if probe["parser"] == "pypdf2":
+        order.reverse()
+    if doc is None or probe["reason"] == "no_text_layer":
+        # Nothing for pymupdf4llm to convert; it would only burn its budget
+        order.remove("pymupdf4llm")
+    logger.info(f"Probe chose {probe['parser']} for {filename} "
+                f"({probe['reason']})")
+
+    for parser in order:
+        started = time.perf_counter()
+        result = None
+        try:
+            result = _PARSERS[parser](doc, pdf_bytes, filename)
+        except ParserTimeout as e:
+            logger.warning(f"{parser} {e} on {filename}")
+        except Exception as e:
+            logger.warning(f"{parser} failed: {str(e)}")
+        finally:
+            timings[f"parse_{parser}"] = time.perf_counter() - started
+
+        if result is not None:
+            started = time.perf_counter()
+            normalization = normalize_pages(result.pop("page_texts"))
+            timings["normalize"] = time.perf_counter() - started
+            result["text"] = normalization.pop("text")
+            result["normalization"] = normalization
+            return result
+
+    # Last resort: simple text fallback
+    try:
+        logger.info(f"Trying simple text extraction for {filename}")
         # Create a simple fallback text for testing
         simple_text = """
         This is a scientific paper about experimental methodology.
@@ -79,20 +348,193 @@ async def extract_text_from_pdf(pdf_path: str) -> Optional[str]:
         Discussion focuses on the implications of these findings.
         """
         logger.info("✅ Using fallback text content")
-        return simple_text.strip()
+        return {
+            "text": simple_text.strip(),
+            "parser": "fallback",
+            "pages": doc.page_count if doc is not None else 0
+        }
 
     except Exception as e:
         logger.error(f"All PDF extraction methods failed: {str(e)}")
 
-    logger.error(f"Failed to extract text from PDF: {pdf_path}")
+    logger.error(f"Failed to extract text from PDF: {filename}")
     return None
 
 
+def _pypdf2_pages(pdf_reader: PyPDF2.PdfReader, start: int,
+                  stop: int) -> List[str]:
+    """PyPDF2's text of each page in [start, stop); failed pages are empty"""
+    page_texts = []
+    for page_num in range(start, stop):
+        try:
+            page_texts.append(pdf_reader.pages[page_num].extract_text()
+                              or "")
+        except Exception as page_error:
+            logger.warning(f"Error extracting page {page_num}: {page_error}")
+            page_texts.append("")
+    return page_texts
+
+
+def _extract_shard_pypdf2_sync(
+        pdf_path: str,
+        filename: str,
+        start: int,
+        stop: int,
+        timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Extract pages [start, stop) with PyPDF2 (executes in a worker process)
+    """
+    if timings is None:
+        timings = {}
+    started = time.perf_counter()
+    page_texts = [""] * (stop - start)
+    try:
+        with _time_budget(config.PDF_PYPDF2_BUDGET):
+            pdf_reader = PyPDF2.PdfReader(pdf_path)
+            page_texts = _pypdf2_pages(pdf_reader, start, stop)
+    except Exception as e:
+        logger.warning(f"PyPDF2 failed on pages {start + 1}-{stop} of "
+                       f"{filename}: {str(e)}")
+    timings["parse_pypdf2"] = time.perf_counter() - started
+    return {"page_texts": page_texts, "parser": "pypdf2", "timings": timings}
+
+
+def _extract_shard_sync(pdf_path: str, filename: str, start: int,
+                        stop: int) -> Dict[str, Any]:
+    """
+    Convert pages [start, stop) with pymupdf4llm, falling back to PyPDF2
+    for just these pages (executes in a worker process).
+
+    The PDF is read from a file shared by all shards rather than pickled
+    to every worker.
+
+    Returns:
+        Dict with the shard's "page_texts" (empty if both parsers failed),
+        the "parser" that produced them and per-attempt "timings"
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    try:
+        with pymupdf.open(pdf_path, filetype="pdf") as doc, \
+                _time_budget(config.PDF_PYMUPDF4LLM_BUDGET):
+            chunks = pymupdf4llm.to_markdown(doc,
+                                             pages=list(range(start, stop)),
+                                             page_chunks=True)
+        page_texts = [chunk["text"] for chunk in chunks]
+        if any(text.strip() for text in page_texts):
+            timings["parse_pymupdf4llm"] = time.perf_counter() - started
+            return {
+                "page_texts": page_texts,
+                "parser": "pymupdf4llm",
+                "timings": timings
+            }
+        logger.warning(f"pymupdf4llm returned empty content for pages "
+                       f"{start + 1}-{stop} of {filename}")
+    except Exception as e:
+        logger.warning(f"pymupdf4llm failed on pages {start + 1}-{stop} of "
+                       f"{filename}: {str(e)}")
+    timings["parse_pymupdf4llm"] = time.perf_counter() - started
+    return _extract_shard_pypdf2_sync(pdf_path, filename, start, stop,
+                                      timings)
+
+
+def _spool_pdf(pdf_bytes: bytes) -> str:
+    """Write PDF bytes to a temporary file in UPLOAD_DIR, returning its path"""
+    with tempfile.NamedTemporaryFile(dir=config.UPLOAD_DIR,
+                                     suffix=".pdf",
+                                     delete=False) as f:
+        f.write(pdf_bytes)
+    return f.name
+
+
+async def _extract_sharded(pdf_bytes: bytes, filename: str,
+                           page_count: int) -> Optional[Dict[str, Any]]:
+    """
+    Convert a large PDF in page-range shards across the extraction pool.
+
+    Each shard is converted by pymupdf4llm in its own worker and falls
+    back to PyPDF2 on its own, so one bad page range does not demote the
+    whole document. The PDF is spooled to a temporary file once and the
+    workers read their pages from it, so the bytes are not copied to every
+    shard job. Shard pages are stitched back together in page order
+    and normalized as one document, so running headers are recognised
+    across shard boundaries.
+
+    Returns:
+        Dict with "text", "parser" ("pymupdf4llm", or "pymupdf4llm+pypdf2"
+        if any shard fell back), "pages", "shards", "shard_fallbacks" and
+        "normalization", or None if no shard produced text
+    """
+    size = config.PDF_SHARD_PAGES
+    ranges = [(start, min(start + size, page_count))
+              for start in range(0, page_count, size)]
+
+    async def run_shard(start: int, stop: int) -> Optional[Dict[str, Any]]:
+        try:
+            return await extraction_pool.run(_extract_shard_sync, pdf_path,
+                                             filename, start, stop)
+        except Exception as e:
+            # Timed out or crashed its worker: retry with PyPDF2 only
+            logger.error(f"Shard {start + 1}-{stop} of {filename} failed: "
+                         f"{e!r}")
+        try:
+            return await extraction_pool.run(_extract_shard_pypdf2_sync,
+                                             pdf_path, filename, start, stop)
+        except Exception as e:
+            logger.error(f"PyPDF2 shard {start + 1}-{stop} of {filename} "
+                         f"failed: {e!r}")
+            return None
+
+    logger.info(f"Extracting {filename} ({page_count} pages) in "
+                f"{len(ranges)} shards")
+    pdf_path = await asyncio.to_thread(_spool_pdf, pdf_bytes)
+    try:
+        with metrics.track_in_flight("pdf_extraction"), \
+                metrics.stage_timer("pdf_extract"):
+            shards = await asyncio.gather(*(run_shard(start, stop)
+                                            for start, stop in ranges))
+    finally:
+        os.unlink(pdf_path)
+
+    page_texts: List[str] = []
+    fallbacks = 0
+    for (start, stop), shard in zip(ranges, shards):
+        if shard is None or shard["parser"] != "pymupdf4llm":
+            fallbacks += 1
+        if shard is None:
+            page_texts += [""] * (stop - start)
+            continue
+        for stage, seconds in shard["timings"].items():
+            metrics.observe_stage(stage, seconds)
+        page_texts += shard["page_texts"]
+
+    if not any(text.strip() for text in page_texts):
+        return None
+    if fallbacks:
+        logger.warning(f"{fallbacks}/{len(ranges)} shards of {filename} "
+                       f"fell back to PyPDF2")
+    try:
+        with metrics.stage_timer("normalize"):
+            normalization = await extraction_pool.run(normalize_pages,
+                                                      page_texts)
+    except Exception as e:
+        logger.error(f"Normalizing {filename} failed: {e!r}")
+        return None
+    return {
+        "text": normalization.pop("text"),
+        "parser": "pymupdf4llm+pypdf2" if fallbacks else "pymupdf4llm",
+        "pages": page_count,
+        "shards": len(ranges),
+        "shard_fallbacks": fallbacks,
+        "normalization": normalization
+    }
+
+
 async def extract_text_from_pdf_bytes(pdf_bytes: bytes,
                                       filename: str = "document.pdf"
                                       ) -> Optional[str]:
     """
-    Extract text from PDF bytes using a temporary file.
+    Extract text from PDF bytes in the extraction process pool.
     
     Args:
         pdf_bytes: PDF file bytes
@@ -101,92 +543,310 @@ async def extract_text_from_pdf_bytes(pdf_bytes: bytes,
     Returns:
         Extracted text content or None if extraction fails
     """
-    temp_path = None
-    try:
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(suffix='.pdf',
-                                         delete=False) as temp_file:
-            temp_file.write(pdf_bytes)
-            temp_path = temp_file.name
+    result = await extract_pdf_bytes(pdf_bytes, filename)
+    return result["text"] if result else None
 
-        # Extract text from temporary file
-        text_content = await extract_text_from_pdf(temp_path)
 
-        return text_content
+def _observe_normalization(result: Dict[str, Any]) -> None:
+    """Count the characters normalization removed, by kind"""
+    normalization = result.get("normalization") or {}
+    for kind in ("header_footer", "page_number", "reference", "whitespace"):
+        chars = normalization.get(f"{kind}_chars", 0)
+        if chars > 0:
+            metrics.NORMALIZED_CHARS.labels(kind=kind).inc(chars)
 
+
+async def _run_extraction_job(pdf_bytes: bytes, filename: str,
+                              *args: Any) -> Optional[Dict[str, Any]]:
+    """Run _extract_from_bytes_sync in the pool and record its timings"""
+    try:
+        with metrics.track_in_flight("pdf_extraction"), \
+                metrics.stage_timer("pdf_extract"):
+            result = await extraction_pool.run(_extract_from_bytes_sync,
+                                               pdf_bytes, filename, *args)
     except Exception as e:
-        logger.error(f"Error processing PDF bytes for {filename}: {str(e)}")
+        logger.error(f"PDF extraction job failed for {filename}: {e!r}")
         return None
+    if result is not None:
+        for stage, seconds in result.get("timings", {}).items():
+            metrics.observe_stage(stage, seconds)
+    return result
 
-    finally:
-        # Clean up temporary file
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.unlink(temp_path)
-            except Exception as cleanup_error:
-                logger.warning(
-                    f"Failed to cleanup temporary file {temp_path}: {cleanup_error}"
-                )
 
+async def extract_pdf_bytes(pdf_bytes: bytes,
+                            filename: str = "document.pdf"
+                            ) -> Optional[Dict[str, Any]]:
+    """
+    Extract text from PDF bytes, reporting which parser produced it.
+
+    A quick probe (page count, text layer, encoding and font health)
+    picks the parser before any conversion starts, in the same pool job
+    as the parse; the probe and each parser run under their own time
+    budget. Documents with a healthy text layer and at least
+    PDF_SHARD_MIN_PAGES pages are converted in parallel page-range shards
+    when the pool has more than one worker; the whole-document fallback
+    chain runs if no shard yields text.
+
+    Args:
+        pdf_bytes: PDF file bytes
+        filename: Original filename for logging
 
-def _clean_text(text: str) -> str:
+    Returns:
+        Dict with "text", "parser", "pages", per-attempt "timings", the
+        "probe" that chose the parser and "normalization" statistics (see
+        normalize_pages()), or None if extraction fails
     """
-    Clean and preprocess extracted text
+    result = await _run_extraction_job(pdf_bytes, filename, None,
+                                       extraction_pool.max_workers > 1)
+    if result is None:
+        return None
+    probe = result["probe"]
+    metrics.PARSER_CHOICES.labels(parser=probe["parser"],
+                                  reason=probe["reason"]).inc()
+
+    if result.get("shard"):
+        sharded = await _extract_sharded(pdf_bytes, filename, probe["pages"])
+        if sharded is not None:
+            sharded["probe"] = {**probe, "parser": "pymupdf4llm"}
+            _observe_normalization(sharded)
+            return sharded
+        # No shard yielded text: run the whole-document chain
+        result = await _run_extraction_job(pdf_bytes, filename, probe)
+        if result is None:
+            return None
+
+    _observe_normalization(result)
+    return result
+
+
+# Running headers/footers are looked for among this many non-blank lines at
+# the top and bottom of each page, must be short (body paragraphs that
+# differ only in numbers are not boilerplate) and must repeat on this share
+# of pages
+_EDGE_LINES = 3
+_EDGE_MAX_CHARS = 120
+_REPEAT_MIN_PAGES = 3
+_REPEAT_MIN_FRACTION = 0.4
+
+_SPACES_RE = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_MARKUP_RE = re.compile(r"[*_#`>|]+")
+_EDGE_NUMBER_RE = re.compile(
+    r"^(?:page\s*)?\d+\W*|\W*(?:page\s*)?\d+(?:\s*(?:of|/)\s*\d+)?$")
+_ROMAN = r"(?=[ivxlc])c{0,3}(?:x[cl]|l?x{0,3})(?:i[xv]|v?i{0,3})"
+_PAGE_NUMBER_RE = re.compile(
+    r"[-\u2013\u2014\s]*(?:(?:page\s*)?\d{1,4}|page\s*" + _ROMAN + r")"
+    r"(?:\s*(?:of|/)\s*\d{1,4})?[-\u2013\u2014\s]*", re.IGNORECASE)
+# A bare roman numeral; single letters ("I", "c") are often labels, so they
+# only count as page numbers when roman numerals number the pages
+_ROMAN_PAGE_RE = re.compile(
+    r"[-\u2013\u2014\s]*(" + _ROMAN + r")[-\u2013\u2014\s]*", re.IGNORECASE)
+
+
+def _edge_key(line: str) -> str:
+    """Comparable form of a header/footer line: no markup, case or leading
+    and trailing page numbers"""
+    line = _SPACES_RE.sub(" ", _MARKUP_RE.sub("", line)).strip().lower()
+    return _EDGE_NUMBER_RE.sub("", line)
+
+
+def _is_page_number(line: str, roman_pages: bool) -> bool:
     """
-    # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
+    Whether an edge line (markup removed) is a bare page number.
 
-    # Remove page numbers and headers/footers (simple heuristic)
-    lines = text.split('\n')
-    cleaned_lines = []
+    Args:
+        line: The stripped line
+        roman_pages: Whether bare roman numerals sit at the edges of enough
+            pages to be the page numbering
+    """
+    if _PAGE_NUMBER_RE.fullmatch(line):
+        return True
+    match = _ROMAN_PAGE_RE.fullmatch(line)
+    return bool(match) and (roman_pages or len(match.group(1)) > 1)
 
-    for line in lines:
-        line = line.strip()
-        # Skip short lines that might be page numbers or headers
-        if len(line) > 10 and not re.match(r'^\d+$', line):
-            cleaned_lines.append(line)
 
-    # Join lines back
-    cleaned_text = ' '.join(cleaned_lines)
+def _edge_indexes(lines: List[str]) -> List[int]:
+    """Indexes of short lines among the first and last non-blank lines"""
+    filled = [index for index, line in enumerate(lines) if line.strip()]
+    return sorted(
+        index for index in set(filled[:_EDGE_LINES] + filled[-_EDGE_LINES:])
+        if len(lines[index].strip()) <= _EDGE_MAX_CHARS)
 
-    # Remove references section if present (simple approach)
-    ref_patterns = [
-        r'references\s*\n.*', r'bibliography\s*\n.*', r'\[\d+\].*?\n'
-    ]
 
-    for pattern in ref_patterns:
-        cleaned_text = re.sub(pattern,
-                              '',
-                              cleaned_text,
-                              flags=re.IGNORECASE | re.DOTALL)
+def normalize_pages(page_texts: List[str]) -> Dict[str, Any]:
+    """
+    Normalize per-page parser output into one prompt-ready text.
+
+    Works page by page on either parser's output:
+    - lines at the top/bottom of pages that repeat (ignoring numbers and
+      markup) on many pages are dropped as running headers/footers
+    - bare page numbers ("12", "Page 3 of 9", "iv") at page edges are
+      dropped; a single-letter roman numeral ("i", "v") only when roman
+      numerals appear at the edges of many pages
+    - the reference list is cut, up to the next recognised section
+    - runs of spaces and of blank lines are collapsed, keeping line breaks
+      so section headings stay detectable
 
-    return cleaned_text.strip()
+    Args:
+        page_texts: Text of each page, in page order
 
+    Returns:
+        Dict with the normalized "text" and the characters removed:
+        "chars_saved" in total and per kind ("header_footer_chars",
+        "page_number_chars", "reference_chars", "whitespace_chars"), plus
+        "header_footer_lines"
+    """
+    pages = [text.split("\n") for text in page_texts]
+    chars_before = sum(len(text) for text in page_texts)
+
+    counts: Dict[str, int] = {}
+    roman_count = 0
+    for lines in pages:
+        edges = [_MARKUP_RE.sub("", lines[i]).strip()
+                 for i in _edge_indexes(lines)]
+        roman_count += any(_ROMAN_PAGE_RE.fullmatch(line) for line in edges)
+        for key in {_edge_key(lines[i]) for i in _edge_indexes(lines)}:
+            counts[key] = counts.get(key, 0) + 1
+    threshold = max(_REPEAT_MIN_PAGES,
+                    _REPEAT_MIN_FRACTION * len(pages))
+    repeated = {
+        key
+        for key, count in counts.items()
+        if count >= threshold and key
+    }
+    roman_pages = roman_count >= _REPEAT_MIN_PAGES
+
+    header_chars = number_chars = header_lines = 0
+    kept_pages = []
+    for lines in pages:
+        drop = set()
+        for index in _edge_indexes(lines):
+            line = _MARKUP_RE.sub("", lines[index]).strip()
+            if _is_page_number(line, roman_pages):
+                number_chars += len(lines[index]) + 1
+                drop.add(index)
+            elif _edge_key(lines[index]) in repeated:
+                header_chars += len(lines[index]) + 1
+                header_lines += 1
+                drop.add(index)
+        kept_pages.append("\n".join(line for index, line in enumerate(lines)
+                                    if index not in drop))
+
+    text = "\n".join(kept_pages)
+    sections = split_sections(text)
+    reference_chars = sum(
+        len(section["heading"]) + len(section["text"])
+        for section in sections if section["name"] == "references")
+    if reference_chars:
+        text = "".join(section["heading"] + section["text"]
+                       for section in sections
+                       if section["name"] != "references")
+
+    stripped = "\n".join(
+        _SPACES_RE.sub(" ", line).strip() for line in text.split("\n"))
+    stripped = _BLANK_LINES_RE.sub("\n\n", stripped).strip()
+    whitespace_chars = len(text) - len(stripped)
+
+    return {
+        "text": stripped,
+        "chars_saved": chars_before - len(stripped),
+        "header_footer_lines": header_lines,
+        "header_footer_chars": header_chars,
+        "page_number_chars": number_chars,
+        "reference_chars": reference_chars,
+        "whitespace_chars": whitespace_chars
+    }
 
-def extract_sections(text: str) -> Dict[str, str]:
+
+# Heading line: optional markdown hashes/bold and numbering, then a short title
+_HEADING_RE = re.compile(
+    r"^[ \t]{0,3}(?:#{1,6}[ \t]*)?(?:\*\*|__)?[ \t]*"
+    r"(?:(?:\d+|[IVX]+)(?:\.\d+)*\.?[ \t]+)?"
+    r"(?P<title>[A-Za-z][A-Za-z &/,\-]{2,60}?)"
+    r"[ \t]*(?:\*\*|__)?[ \t]*:?[ \t]*$", re.MULTILINE)
+
+# Canonical section name -> heading titles that introduce it
+_SECTION_TITLES = [
+    ("references",
+     re.compile(r"references|bibliography|literature cited|works cited")),
+    ("backmatter",
+     re.compile(r"acknowledge?ments?|funding|author contributions|"
+                r"competing interests|conflicts? of interests?|"
+                r"declaration of interests|data availability|"
+                r"ethics statement")),
+    ("abstract", re.compile(r"abstract|summary")),
+    ("introduction", re.compile(r"introduction|background")),
+    ("methods",
+     re.compile(r"(?:materials? and |patients and |star |online )?methods?|"
+                r"methodology|materials|study design|"
+                r"experimental(?: procedures| section| design| methods)?")),
+    ("results", re.compile(r"results?(?: and discussion)?|findings")),
+    ("discussion", re.compile(r"discussion")),
+    ("conclusion", re.compile(r"conclusions?|concluding remarks")),
+    ("supplementary",
+     re.compile(r"supplementary (?:information|materials?|methods)|"
+                r"supporting information")),
+    ("figures", re.compile(r"figure legends|figure captions")),
+]
+
+
+def _classify_heading(title: str) -> Optional[str]:
+    title = title.strip().lower()
+    for name, pattern in _SECTION_TITLES:
+        if pattern.fullmatch(title):
+            return name
+    return None
+
+
+def split_sections(text: str) -> List[Dict[str, str]]:
     """
-    Attempt to extract common paper sections
+    Split paper text into sections at recognised top-level headings.
+
+    Works on line-based parser output (e.g. pymupdf4llm markdown). Text
+    before the first heading is returned as a "front" section, and
+    unrecognised headings (subsections) stay inside their parent section.
+
+    Args:
+        text: Extracted paper text
+
+    Returns:
+        Sections in document order, each a dict with "name", "heading"
+        and "text"
     """
-    sections = {}
-
-    # Common section patterns
-    section_patterns = {
-        "abstract":
-        r"abstract\s*:?\s*(.*?)(?=\n\s*(?:introduction|keywords|1\.|method))",
-        "introduction":
-        r"introduction\s*:?\s*(.*?)(?=\n\s*(?:method|material|experiment|2\.))",
-        "methods":
-        r"(?:method|material|experiment).*?\s*(.*?)(?=\n\s*(?:result|discussion|3\.))",
-        "results": r"result.*?\s*(.*?)(?=\n\s*(?:discussion|conclusion|4\.))",
-        "discussion":
-        r"discussion\s*(.*?)(?=\n\s*(?:conclusion|reference|5\.))",
-        "conclusion": r"conclusion\s*(.*?)(?=\n\s*(?:reference|acknowledge))"
-    }
+    sections = []
+    name, heading, start = "front", "", 0
+
+    for match in _HEADING_RE.finditer(text):
+        section_name = _classify_heading(match.group("title"))
+        if section_name is None:
+            continue
+        sections.append({
+            "name": name,
+            "heading": heading,
+            "text": text[start:match.start()]
+        })
+        name, heading, start = section_name, match.group(0), match.end()
+
+    sections.append({"name": name, "heading": heading, "text": text[start:]})
+    return [
+        section for section in sections
+        if section["text"].strip() or section["heading"]
+    ]
 
-    for section_name, pattern in section_patterns.items():
-        match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-        if match:
-            sections[section_name] = match.group(
-                1).strip()[:2000]  # Limit length
 
-    return sections
+def extract_sections(text: str) -> Dict[str, str]:
+    """
+    Attempt to extract common paper sections
+    """
+    sections: Dict[str, str] = {}
+
+    for section in split_sections(text):
+        if section["name"] == "front":
+            continue
+        body = section["text"].strip()
+        if section["name"] in sections:
+            body = sections[section["name"]] + "\n\n" + body
+        sections[section["name"]] = body
+
+    # Limit length
+    return {name: body[:2000] for name, body in sections.items()}
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Set
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class PdfExtractionPool:
+    """
+    Process pool for CPU-bound PDF parsing.
+
+    Keeps pymupdf4llm/PyPDF2 off the event loop so one large paper does not
+    stall every other request on the worker. The pool is started lazily,
+    and a job that times out or kills its worker process causes the pool to
+    be torn down and rebuilt, so a pathological PDF cannot wedge it.
+
+    A crash breaks every job on the pool, not just the culprit's. Each job
+    that sees the pool break is retried alone in a fresh single-worker
+    executor: the culprit breaks that one too and fails, the others finish
+    there, and later jobs go to the rebuilt shared pool.
+
+    At most max_workers jobs are handed to the executor at once; the rest
+    wait for a free worker first, so a job's timeout only counts the time
+    it actually runs, never time spent queued behind other jobs.
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 job_timeout: Optional[float] = None):
+        self.max_workers = max_workers or config.PDF_WORKERS
+        self.job_timeout = job_timeout or config.PDF_JOB_TIMEOUT
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._closed = False
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._isolated: Set[ProcessPoolExecutor] = set()
+
+    def start(self) -> ProcessPoolExecutor:
+        """Start the worker processes if they are not already running"""
+        self._closed = False
+        if self._executor is None:
+            logger.info(
+                f"Starting PDF extraction pool with {self.max_workers} workers")
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes, cancelling any queued jobs"""
+        self._closed = True
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            logger.info("Shutting down PDF extraction pool")
+            executor.shutdown(wait=wait, cancel_futures=True)
+        for isolated in list(self._isolated):
+            _terminate(isolated)
+
+    def _reset(self, executor: ProcessPoolExecutor) -> None:
+        """
+        Kill the workers of a stuck or broken executor.
+
+        Only the executor the failing job was submitted to is reset, so
+        concurrent failures do not tear down a freshly rebuilt pool. Other
+        jobs on it fail with BrokenProcessPool and are retried by run().
+        """
+        if executor is not self._executor:
+            return
+        self._executor = None
+        _terminate(executor)
+        logger.warning("PDF extraction pool reset")
+
+    def _worker_slots(self) -> asyncio.Semaphore:
+        # One semaphore per event loop (the app and bulk_extract each run
+        # their own)
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._slots_loop = loop
+        return self._slots
+
+    async def run(self,
+                  func: Callable[..., Any],
+                  *args: Any,
+                  timeout: Optional[float] = None) -> Any:
+        """
+        Run func(*args) in a worker process.
+
+        The timeout starts once a worker is free to run the job. If the
+        pool breaks under the job (its own crash, a neighbour's crash or
+        another job's timeout), the job is retried once, alone in a fresh
+        single-worker executor, with a new timeout.
+
+        Args:
+            func: Module-level (picklable) function to execute
+            *args: Picklable arguments for func
+            timeout: Per-job timeout in seconds, defaults to job_timeout
+
+        Returns:
+            The function's return value
+
+        Raises:
+            asyncio.TimeoutError: If the job exceeds its timeout
+            BrokenProcessPool: If the job also breaks its isolated worker,
+                i.e. the job itself kills the process
+            RuntimeError: If the pool was shut down while the job was
+                queued or running
+        """
+        timeout = timeout or self.job_timeout
+
+        async with self._worker_slots():
+            executor = self.start()
+            try:
+                return await self._run_on(executor, func, args, timeout)
+            except BrokenProcessPool:
+                logger.error(f"PDF pool broke while running {func.__name__}, "
+                             f"retrying it in isolation")
+                self._reset(executor)
+            return await self._run_isolated(func, args, timeout)
+
+    async def _run_isolated(self, func: Callable[..., Any], args: tuple,
+                            timeout: float) -> Any:
+        executor = ProcessPoolExecutor(max_workers=1)
+        self._isolated.add(executor)
+        try:
+            return await self._run_on(executor, func, args, timeout)
+        except BrokenProcessPool:
+            if self._closed:
+                raise RuntimeError("PDF extraction pool was shut down")
+            logger.error(f"PDF job {func.__name__} broke an isolated worker; "
+                         f"failing it")
+            raise
+        finally:
+            self._isolated.discard(executor)
+            _terminate(executor)
+
+    async def _run_on(self, executor: ProcessPoolExecutor,
+                      func: Callable[..., Any], args: tuple,
+                      timeout: float) -> Any:
+        """
+        Run one job on executor and wait for it.
+
+        A timed-out job takes its executor down with it (the shared pool is
+        rebuilt on next use). Cancellation inside the executor, which is not
+        our caller's, is reported as BrokenProcessPool.
+        """
+        future = asyncio.wrap_future(executor.submit(func, *args))
+        try:
+            done, _ = await asyncio.wait({future}, timeout=timeout)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        if not done:
+            logger.error(f"PDF job {func.__name__} timed out after {timeout}s")
+            future.cancel()
+            if executor is self._executor:
+                self._reset(executor)
+            else:
+                _terminate(executor)
+            raise asyncio.TimeoutError()
+
+        if future.cancelled():
+            if self._closed:
+                raise RuntimeError("PDF extraction pool was shut down")
+            raise BrokenProcessPool(
+                f"PDF job {func.__name__} was cancelled by the pool")
+        return future.result()
+
+
+def _terminate(executor: ProcessPoolExecutor) -> None:
+    # ProcessPoolExecutor has no public way to stop a running job, so
+    # terminate its processes directly.
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+# Shared pool used by the PDF parser
+extraction_pool = PdfExtractionPool()
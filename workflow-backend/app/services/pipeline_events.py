@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineEvents:
+    """
+    Timestamped event log for one run of the extraction pipeline.
+
+    Each event records the wall-clock timestamp, the time elapsed since the
+    pipeline started and the duration since the previous event, so the log
+    doubles as a per-stage latency breakdown. Subscribers (e.g. the SSE
+    endpoint) receive past events followed by live ones until close().
+    """
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.closed = False
+        self._started = time.perf_counter()
+        self._last = self._started
+        self._subscribers: List[asyncio.Queue] = []
+
+    def emit(self, name: str, **data: Any) -> Dict[str, Any]:
+        """
+        Record an event and forward it to subscribers.
+
+        Args:
+            name: Event name, e.g. "parser_chosen"
+            **data: Extra JSON-serializable event fields
+
+        Returns:
+            The recorded event
+        """
+        now = time.perf_counter()
+        event = {
+            "event": name,
+            "timestamp": time.time(),
+            "elapsed_ms": round((now - self._started) * 1000, 1),
+            "duration_ms": round((now - self._last) * 1000, 1),
+            **data
+        }
+        self._last = now
+        self.events.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+        return event
+
+    def close(self) -> None:
+        """Mark the pipeline finished and end all subscriber streams"""
+        if self.closed:
+            return
+        self.closed = True
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+
+    async def subscribe(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every event so far, then new events until close()"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        if self.closed:
+            queue.put_nowait(None)
+        else:
+            self._subscribers.append(queue)
+
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            if queue in self._subscribers:
+                self._subscribers.remove(queue)
+
+    def summary(self) -> str:
+        """One-line stage latency breakdown for logging"""
+        parts = [f"{e['event']}={e['duration_ms']}ms" for e in self.events]
+        total = self.events[-1]["elapsed_ms"] if self.events else 0
+        return f"total={total}ms " + " ".join(parts)
+
+
+def ensure_events(events: Optional[PipelineEvents]) -> PipelineEvents:
+    """Return events, or a throwaway log when the caller is not listening"""
+    return events if events is not None else PipelineEvents()
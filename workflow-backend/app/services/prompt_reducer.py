@@ -0,0 +1,259 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+import config
+from .pdf_parser import split_sections
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for English scientific prose
+CHARS_PER_TOKEN = 4
+
+# Sections worth sending to the LLM, most valuable first. Everything else
+# (introduction, discussion, references, ...) is dropped.
+SECTION_PRIORITY = [
+    "methods", "results", "abstract", "supplementary", "figures", "front"
+]
+
+# The front matter (title, authors, affiliations) only needs its start
+FRONT_MAX_CHARS = 2000
+
+# Sections trimmed first when a prompt is over its input budget, least
+# valuable first; SECTION_PRIORITY's sections follow in reverse
+TRIM_ORDER = [
+    "references", "backmatter", "introduction", "discussion", "conclusion"
+] + SECTION_PRIORITY[::-1]
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+_DIGIT_RE = re.compile(r"\d")
+_SYMBOL_RE = re.compile(r"[^\w\s]|_")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate used for budgeting.
+
+    Words cost one token per CHARS_PER_TOKEN letters (at least one each),
+    and every digit and punctuation mark costs a token of its own, as
+    they do in Gemini's tokenizer. Numbers, units and symbols are dense in
+    methods sections, so this is closer than a flat characters-per-token
+    ratio. The estimate of a text never exceeds the sum of the estimates
+    of its parts.
+    """
+    words = _WORD_RE.findall(text)
+    letters = sum(map(len, words))
+    return (max(len(words), -(-letters // CHARS_PER_TOKEN)) +
+            len(_DIGIT_RE.findall(text)) + len(_SYMBOL_RE.findall(text)))
+
+
+def reduce_paper_text(text: str,
+                      token_budget: Optional[int] = None,
+                      truncate: bool = True) -> Dict[str, Any]:
+    """
+    Keep only the methods/results-relevant parts of a paper.
+
+    Sections are detected with split_sections and added in SECTION_PRIORITY
+    order until the token budget (in estimate_tokens() units) is spent,
+    then emitted in their original document order. If no methods or
+    results section is recognised the text is kept whole (truncated to the
+    budget), so papers with unusual layouts still reach the LLM.
+
+    Args:
+        text: Extracted paper text
+        token_budget: Maximum estimated tokens to keep, defaults to
+            config.PROMPT_TOKEN_BUDGET
+        truncate: False to only drop low-value sections and keep every
+            prioritised section whole (for map-reduce, which handles any
+            length); token_budget is then ignored
+
+    Returns:
+        Dict with the reduced "text" and statistics on what was removed
+    """
+    token_budget = token_budget or config.PROMPT_TOKEN_BUDGET
+    sections = split_sections(text)
+    names = {section["name"] for section in sections}
+
+    if not names & {"methods", "results"}:
+        reduced = _truncate_to_tokens(text, token_budget) if truncate else text
+        kept = [section["name"] for section in sections]
+        dropped: List[str] = []
+    else:
+        budget = token_budget
+        selected = set()
+        pieces: Dict[int, str] = {}
+        for name in SECTION_PRIORITY:
+            for index, section in enumerate(sections):
+                if section["name"] != name or (truncate and budget <= 0):
+                    continue
+                piece = section["heading"] + section["text"]
+                if name == "front":
+                    piece = piece[:FRONT_MAX_CHARS]
+                if truncate:
+                    piece = _truncate_to_tokens(piece, budget)
+                    budget -= estimate_tokens(piece)
+                pieces[index] = piece
+                selected.add(index)
+
+        reduced = "\n\n".join(pieces[i].strip() for i in sorted(pieces))
+        kept = [sections[i]["name"] for i in sorted(selected)]
+        dropped = [
+            section["name"] for i, section in enumerate(sections)
+            if i not in selected
+        ]
+
+    result = {
+        "text": reduced,
+        "original_chars": len(text),
+        "reduced_chars": len(reduced),
+        "removed_chars": len(text) - len(reduced),
+        "estimated_tokens": estimate_tokens(reduced),
+        "sections_kept": kept,
+        "sections_dropped": dropped
+    }
+    logger.info(
+        f"Prompt reduction kept {result['reduced_chars']}/{len(text)} chars "
+        f"(kept={kept}, dropped={dropped})")
+    return result
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix (preferably ending at a paragraph) within max_tokens"""
+    if max_tokens <= 0:
+        return ""
+    cut = text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = estimate_tokens(cut)
+    while tokens > max_tokens:
+        cut = cut[:min(len(cut) - 1, len(cut) * max_tokens // tokens)]
+        tokens = estimate_tokens(cut)
+    boundary = cut.rfind("\n\n")
+    if len(cut) < len(text) and boundary > len(cut) // 2:
+        cut = cut[:boundary]
+    return cut
+
+
+def fit_paper_text(text: str, token_budget: int) -> Dict[str, Any]:
+    """
+    Trim paper text until its estimated tokens fit a budget.
+
+    Sections are trimmed in TRIM_ORDER, the last section of a kind first:
+    each is dropped whole while that is still not enough, and the one that
+    brings the text within budget is cut at a paragraph boundary instead.
+    The remaining text keeps its document order. Text already within
+    budget is returned unchanged.
+
+    Args:
+        text: Paper text
+        token_budget: Maximum estimated tokens to keep
+
+    Returns:
+        Dict with the fitted "text", its "estimated_tokens" and what was
+        trimmed: "trimmed_tokens", "trimmed_chars", "sections_dropped" and
+        "sections_truncated"
+    """
+    tokens = estimate_tokens(text)
+    fit: Dict[str, Any] = {
+        "text": text,
+        "estimated_tokens": tokens,
+        "trimmed_tokens": 0,
+        "trimmed_chars": 0,
+        "sections_dropped": [],
+        "sections_truncated": []
+    }
+    if tokens <= token_budget:
+        return fit
+
+    sections = split_sections(text)
+    pieces = [section["heading"] + section["text"] for section in sections]
+    costs = [estimate_tokens(piece) for piece in pieces]
+    # Sums of part estimates bound the estimate of the joined text
+    excess = sum(costs) - max(token_budget, 0)
+    rank = {name: index for index, name in enumerate(TRIM_ORDER)}
+    order = sorted(range(len(sections)),
+                   key=lambda i: (rank.get(sections[i]["name"], -1), -i))
+
+    for index in order:
+        if excess <= 0:
+            break
+        name = sections[index]["name"]
+        if costs[index] <= excess:
+            pieces[index] = ""
+            excess -= costs[index]
+            fit["sections_dropped"].append(name)
+        else:
+            kept = _truncate_to_tokens(pieces[index], costs[index] - excess)
+            excess -= costs[index] - estimate_tokens(kept)
+            pieces[index] = kept.rstrip() + "\n\n" if kept.strip() else ""
+            fit["sections_truncated"].append(name)
+
+    fitted = "".join(pieces).strip()
+    fit.update({
+        "text": fitted,
+        "estimated_tokens": estimate_tokens(fitted),
+        "trimmed_tokens": tokens - estimate_tokens(fitted),
+        "trimmed_chars": len(text) - len(fitted)
+    })
+    logger.info(f"Prompt fitting trimmed {fit['trimmed_tokens']} of {tokens} "
+                f"estimated tokens (dropped={fit['sections_dropped']}, "
+                f"truncated={fit['sections_truncated']})")
+    return fit
+
+
+def _split_long(piece: str, max_tokens: int) -> List[str]:
+    """Split an oversized section at paragraph, then hard, boundaries"""
+    parts: List[str] = []
+    current = ""
+    current_tokens = 0
+    for paragraph in piece.split("\n\n"):
+        tokens = estimate_tokens(paragraph)
+        while tokens > max_tokens:
+            head = _truncate_to_tokens(paragraph, max_tokens)
+            parts.append(head)
+            paragraph = paragraph[len(head):]
+            tokens = estimate_tokens(paragraph)
+        if current and current_tokens + tokens > max_tokens:
+            parts.append(current)
+            current, current_tokens = "", 0
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+        current_tokens += tokens
+    if current:
+        parts.append(current)
+    return parts
+
+
+def chunk_paper_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Split paper text into section-aligned chunks of at most max_tokens.
+
+    Whole sections are packed greedily into chunks; a section larger than
+    a chunk is split at paragraph boundaries. Sizes are measured with
+    estimate_tokens(), the same unit as the map-reduce threshold.
+
+    Args:
+        text: Paper text
+        max_tokens: Estimated token limit per chunk
+
+    Returns:
+        Chunks in document order
+    """
+    chunks: List[str] = []
+    current = ""
+    current_tokens = 0
+
+    for section in split_sections(text):
+        piece = (section["heading"] + section["text"]).strip()
+        if not piece:
+            continue
+        tokens = estimate_tokens(piece)
+        for part in (_split_long(piece, max_tokens)
+                     if tokens > max_tokens else [piece]):
+            part_tokens = estimate_tokens(part)
+            if current and current_tokens + part_tokens > max_tokens:
+                chunks.append(current)
+                current, current_tokens = "", 0
+            current = f"{current}\n\n{part}" if current else part
+            current_tokens += part_tokens
+
+    if current:
+        chunks.append(current)
+    return chunks
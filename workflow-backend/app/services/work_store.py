@@ -0,0 +1,254 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import json_codec
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(title: str) -> str:
+    return " ".join(title.lower().split())
+
+
+class WorkStore:
+    """
+    Local SQLite store of OpenAlex works keyed by short work id.
+
+    Holds the fields the citation graph needs (title, year, cited-by count,
+    referenced_works and OpenAlex's updated_date), the citing works seen
+    for each work, and title search results. Entries are fresh for ttl
+    seconds after they were fetched or revalidated; stale works are kept so
+    the client can revalidate them against updated_date instead of
+    refetching them. The least recently used works are evicted beyond
+    max_works.
+    """
+
+    def __init__(self, path: str, max_works: int, ttl: float):
+        self.path = path
+        self.max_works = max_works
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = [
+            row[1]
+            for row in self._conn.execute("PRAGMA table_info(citing)")
+        ]
+        if columns and "max_results" not in columns:
+            # Lists from before max_results were pooled across several
+            # cited works and may be truncated: drop them
+            self._conn.execute("DROP TABLE citing")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS works (
+                id TEXT PRIMARY KEY,
+                work TEXT NOT NULL,
+                updated_date TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_works_last_access
+                ON works(last_access);
+            CREATE TABLE IF NOT EXISTS citing (
+                id TEXT PRIMARY KEY,
+                citing TEXT NOT NULL,
+                max_results INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS searches (
+                query TEXT PRIMARY KEY,
+                work_id TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );""")
+        self._conn.commit()
+
+    def _fresh(self, fetched_at: float, now: float) -> bool:
+        return now - fetched_at <= self.ttl
+
+    def get_works(
+        self, ids: Iterable[str]
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        Look up works by short id in one query.
+
+        Returns:
+            (fresh, stale) dicts mapping short id to work; ids not stored
+            are in neither
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}, {}
+
+        now = time.time()
+        fresh: Dict[str, Dict[str, Any]] = {}
+        stale: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            rows = []
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows += self._conn.execute(
+                    f"SELECT id, work, fetched_at FROM works "
+                    f"WHERE id IN ({placeholders})", chunk).fetchall()
+            for work_id, work, fetched_at in rows:
+                target = fresh if self._fresh(fetched_at, now) else stale
+                target[work_id] = json_codec.loads(work)
+            if rows:
+                self._conn.executemany(
+                    "UPDATE works SET last_access = ? WHERE id = ?",
+                    [(now, row[0]) for row in rows])
+                self._conn.commit()
+            self.hits += len(fresh)
+            self.stale += len(stale)
+            self.misses += len(ids) - len(rows)
+        return fresh, stale
+
+    def put_works(self, works: Iterable[Dict[str, Any]]) -> None:
+        """Store (or replace) works as fetched now"""
+        now = time.time()
+        rows = [(work["id"].rsplit("/", 1)[-1], json_codec.dumps(work),
+                 work.get("updated_date"), now, now) for work in works]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO works VALUES (?, ?, ?, ?, ?)", rows)
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, ids: Iterable[str]) -> None:
+        """Mark stale works as fresh again after a successful revalidation"""
+        now = time.time()
+        rows = [(now, work_id) for work_id in ids]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE works SET fetched_at = ? WHERE id = ?", rows)
+            self._conn.commit()
+            self.revalidated += len(rows)
+
+    def _evict(self) -> None:
+        """Drop the least recently used works beyond max_works"""
+        total = self._conn.execute("SELECT COUNT(*) FROM works").fetchone()[0]
+        excess = total - self.max_works
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM works WHERE id IN (SELECT id FROM works "
+                "ORDER BY last_access LIMIT ?)", (excess, ))
+            self.evictions += excess
+
+    def get_citing(self, ids: Iterable[str],
+                   limit: int) -> Dict[str, List[str]]:
+        """
+        Return the fresh citing-work lists stored for short ids.
+
+        A stored list answers a request for limit works if it was fetched
+        with at least that limit, or if it came back shorter than its own
+        limit (it then holds every citing work).
+
+        Returns:
+            Dict mapping short id to the full ids of up to limit works
+            citing it, most cited first; missing, stale or too short
+            lists are omitted
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        now = time.time()
+        found = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for work_id, citing, max_results, fetched_at in (
+                        self._conn.execute(
+                            f"SELECT id, citing, max_results, fetched_at "
+                            f"FROM citing WHERE id IN ({placeholders})",
+                            chunk)):
+                    if not self._fresh(fetched_at, now):
+                        continue
+                    citing = json_codec.loads(citing)
+                    if max_results >= limit or len(citing) < max_results:
+                        found[work_id] = citing[:limit]
+        return found
+
+    def put_citing(self, citing: Dict[str, List[str]], limit: int) -> None:
+        """
+        Store the citing-work lists for short ids.
+
+        Args:
+            citing: Short id -> full ids of the most cited citing works
+            limit: The number of citing works each list was fetched with
+        """
+        now = time.time()
+        rows = [(work_id, json_codec.dumps(ids), limit, now)
+                for work_id, ids in citing.items()]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO citing VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def get_search(self, title: str) -> Optional[str]:
+        """Short id of the work a title search last resolved to, if fresh"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT work_id, fetched_at FROM searches WHERE query = ?",
+                (_normalize(title), )).fetchone()
+        if row is None or not self._fresh(row[1], time.time()):
+            return None
+        return row[0]
+
+    def put_search(self, title: str, work_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?)",
+                (_normalize(title), work_id, time.time()))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.executescript(
+                "DELETE FROM works; DELETE FROM citing; DELETE FROM searches;")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/revalidation counters and current store size"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(work)), 0) FROM works"
+            ).fetchone()
+            citing = self._conn.execute(
+                "SELECT COUNT(*) FROM citing").fetchone()[0]
+        lookups = self.hits + self.stale + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "revalidated": self.revalidated,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "citing_lists": citing,
+            "bytes": size,
+            "max_works": self.max_works,
+            "ttl": self.ttl
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
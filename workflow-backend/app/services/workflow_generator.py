@@ -1,34 +1,130 @@
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any
+import os
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, Any, Optional
 
-from .pdf_parser import extract_text_from_pdf_bytes
+import config
+from . import metrics
+from .cache_store import SQLiteCache
+from .enrichment_prewarmer import EnrichmentPrewarmer
+from .pdf_parser import extract_pdf_bytes
+from .prompt_reducer import estimate_tokens, reduce_paper_text
 from .gemini_service import GeminiService
+from .pipeline_events import PipelineEvents, ensure_events
 
 logger = logging.getLogger(__name__)
 
+# Called with (progress 0-100, message) as the pipeline advances
+ProgressCallback = Callable[[int, str], None]
+
 
 class WorkflowGenerator:
 
-    def __init__(self):
+    def __init__(self,
+                 cache: Optional[SQLiteCache] = None,
+                 prewarmer: Optional[EnrichmentPrewarmer] = None):
         self.gemini_service = GeminiService()
+        self.prewarmer = prewarmer
+        if cache is None and config.WORKFLOW_CACHE_ENABLED:
+            cache = SQLiteCache(os.path.join(config.CACHE_DIR,
+                                             "workflows.sqlite3"),
+                                max_bytes=config.WORKFLOW_CACHE_MAX_BYTES)
+        self.cache = cache
+        if cache is not None:
+            metrics.register_cache("workflow", cache)
 
-    async def generate_workflow_from_pdf(self, pdf_bytes: bytes,
-                                         filename: str) -> Dict[str, Any]:
+    def cache_key(self, content_hash: str) -> str:
+        """
+        Build the cache key for a PDF: content hash plus prompt/model version
+        """
+        return (f"{content_hash}:{self.gemini_service.model_name}:"
+                f"{self.gemini_service.prompt_version}")
+
+    def _prewarm(self, workflow: Dict[str, Any], filename: str,
+                 events: PipelineEvents) -> None:
+        """Queue background enrichment of the workflow's entities"""
+        if self.prewarmer is not None and self.prewarmer.schedule(
+                workflow, filename):
+            events.emit("enrichment_prewarm_scheduled")
+
+    async def generate_workflow_from_pdf(
+            self,
+            pdf_bytes: bytes,
+            filename: str,
+            content_hash: Optional[str] = None,
+            progress_callback: Optional[ProgressCallback] = None,
+            events: Optional[PipelineEvents] = None,
+            parse_slots: Optional[asyncio.Semaphore] = None,
+            llm_slots: Optional[asyncio.Semaphore] = None) -> Dict[str, Any]:
         """
         Generate workflow from PDF content using AI processing.
+
+        Results are cached by the SHA-256 of the PDF bytes, so uploading
+        the same paper again skips parsing and the LLM call. With a
+        prewarmer, the workflow's reagents and equipment are then enriched
+        in the background.
         
         Args:
             pdf_bytes: PDF file content as bytes
             filename: Original filename
+            content_hash: Precomputed SHA-256 hex digest of pdf_bytes
+            progress_callback: Optional callback receiving progress updates
+            events: Optional event log receiving timestamped stage events
+            parse_slots: Optional semaphore held while extracting text
+            llm_slots: Optional semaphore held during the LLM call
             
         Returns:
-            Generated workflow JSON or error response
+            Generated workflow JSON or error response; freshly generated
+            workflows include per-stage "timings" in seconds
         """
+
+        events = ensure_events(events)
+        outcome = "error"
+
+        def report(progress: int, message: str) -> None:
+            if progress_callback is not None:
+                progress_callback(progress, message)
+
+        started = time.perf_counter()
+        # Seconds per stage, excluding waits for parse/LLM slots
+        timings: Dict[str, float] = {}
+        metrics.IN_FLIGHT.labels(operation="pipeline").inc()
         try:
+            key = None
+            if self.cache is not None:
+                with metrics.stage_timer("cache_lookup"):
+                    content_hash = content_hash or hashlib.sha256(
+                        pdf_bytes).hexdigest()
+                    key = self.cache_key(content_hash)
+                    cached = self.cache.get(key)
+                if cached is not None:
+                    logger.info(f"Workflow cache hit for {filename}")
+                    events.emit("cache_hit")
+                    outcome = "cached"
+                    self._prewarm(cached["workflow"], filename, events)
+                    return {
+                        "success": True,
+                        "workflow": cached["workflow"],
+                        "text_length": cached["text_length"],
+                        "prompt_text_length": cached.get("prompt_text_length"),
+                        "estimated_input_tokens":
+                        cached.get("estimated_input_tokens"),
+                        "prompt_trimming": cached.get("prompt_trimming"),
+                        "filename": filename,
+                        "cached": True
+                    }
+
             # Step 1: Extract text from PDF
             logger.info(f"Extracting text from PDF: {filename}")
-            text_content = await extract_text_from_pdf_bytes(
-                pdf_bytes, filename)
+            report(10, "Extracting text from PDF")
+            async with parse_slots or nullcontext():
+                stage_started = time.perf_counter()
+                extraction = await extract_pdf_bytes(pdf_bytes, filename)
+                timings["pdf_extract"] = time.perf_counter() - stage_started
+            text_content = extraction["text"] if extraction else None
 
             if not text_content:
                 logger.error(f"Failed to extract text from PDF: {filename}")
@@ -38,20 +134,77 @@ class WorkflowGenerator:
                     "workflow": None
                 }
 
-            # Step 2: Generate workflow using AI
+            events.emit("parser_chosen",
+                        parser=extraction["parser"],
+                        reason=extraction.get("probe", {}).get("reason"))
+            events.emit("text_extracted",
+                        characters=len(text_content),
+                        pages=extraction["pages"],
+                        chars_saved=extraction.get("normalization",
+                                                   {}).get("chars_saved", 0))
+
+            # Step 2: Keep only the methods/results-relevant text
+            prompt_text = text_content
+            if config.PROMPT_REDUCTION_ENABLED:
+                stage_started = time.perf_counter()
+                with metrics.stage_timer("prompt_reduce"):
+                    # Map-reduce handles any length: drop low-value
+                    # sections but keep methods/results whole
+                    truncate = not (config.MAPREDUCE_ENABLED
+                                    and estimate_tokens(text_content) >
+                                    config.MAPREDUCE_THRESHOLD_TOKENS)
+                    reduction = reduce_paper_text(text_content,
+                                                  truncate=truncate)
+                timings["prompt_reduce"] = time.perf_counter() - stage_started
+                prompt_text = reduction["text"]
+                events.emit("text_reduced",
+                            removed_chars=reduction["removed_chars"],
+                            reduced_chars=reduction["reduced_chars"],
+                            sections_kept=reduction["sections_kept"],
+                            sections_dropped=reduction["sections_dropped"])
+
+            # Step 3: Generate workflow using AI
             logger.info(
-                f"Generating workflow from extracted text ({len(text_content)} chars)"
+                f"Generating workflow from extracted text ({len(prompt_text)} chars)"
             )
-            workflow_result = self.gemini_service.generate_workflow_from_text(
-                text_content)
+            report(40, "Generating workflow with AI")
+            async with llm_slots or nullcontext():
+                stage_started = time.perf_counter()
+                workflow_result = await self.gemini_service.generate_workflow_from_text(
+                    prompt_text, events=events)
+                timings["llm"] = time.perf_counter() - stage_started
 
             if workflow_result.get("success", False):
                 logger.info("Successfully generated workflow from PDF")
+                fallback = workflow_result.get("fallback")
+                outcome = "fallback" if fallback else "success"
+                # Absent when no prompt was built (no API key)
+                trimming = dict(workflow_result.get("prompt") or {})
+                input_tokens = trimming.pop("estimated_input_tokens", None)
+                if key is not None and not fallback:
+                    with metrics.stage_timer("cache_store"):
+                        self.cache.set(
+                            key, {
+                                "workflow": workflow_result["workflow"],
+                                "text_length": len(text_content),
+                                "prompt_text_length": len(prompt_text),
+                                "estimated_input_tokens": input_tokens,
+                                "prompt_trimming": trimming or None
+                            })
+                if not fallback:
+                    self._prewarm(workflow_result["workflow"], filename,
+                                  events)
                 return {
                     "success": True,
                     "workflow": workflow_result["workflow"],
                     "text_length": len(text_content),
-                    "filename": filename
+                    "prompt_text_length": len(prompt_text),
+                    "estimated_input_tokens": input_tokens,
+                    "prompt_trimming": trimming or None,
+                    "filename": filename,
+                    "cached": False,
+                    "fallback": bool(fallback),
+                    "timings": timings
                 }
             else:
                 error_detail = workflow_result.get('error', 'Unknown error')
@@ -73,3 +226,9 @@ class WorkflowGenerator:
                 "error": f"Pipeline error: {str(e)}",
                 "workflow": None
             }
+
+        finally:
+            metrics.IN_FLIGHT.labels(operation="pipeline").dec()
+            metrics.observe_stage("pipeline", time.perf_counter() - started)
+            metrics.PIPELINE_RESULTS.labels(result=outcome).inc()
+            logger.info(f"Pipeline timings for {filename}: {events.summary()}")
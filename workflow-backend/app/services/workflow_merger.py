@@ -0,0 +1,121 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _id_sort_key(node_id: str) -> Tuple:
+    """Order S2.10 after S2.9 rather than lexically"""
+    return tuple((0, int(part), "") if part.isdigit() else (1, 0, part)
+                 for part in re.findall(r"\d+|\D+", node_id))
+
+
+def _normalize_label(label: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", label.lower()).strip()
+
+
+def _dedupe_edges(edges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    seen = set()
+    unique = []
+    for edge in edges:
+        key = (edge["from"], edge["to"])
+        if key not in seen and edge["from"] != edge["to"]:
+            seen.add(key)
+            unique.append(edge)
+    return unique
+
+
+def merge_workflows(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge partial workflows extracted from consecutive chunks of a paper.
+
+    Partials are processed in chunk order. Stages and steps whose labels
+    match an already merged one are folded into it, others are appended.
+    Stages are renumbered S1, S2, ... and steps S1.1, S1.2, ... under their
+    new stage, edges are rewritten to the new ids, edges to unknown nodes
+    are dropped and duplicate edges are removed. Consecutive chunks are
+    linked with a stage edge when nothing leads into the later chunk yet.
+    The result is deterministic for a given list of partials.
+
+    Args:
+        partials: Workflow dicts with stages, stageEdges, steps, stepEdges
+
+    Returns:
+        A single merged workflow dict
+    """
+    merged: Dict[str, Any] = {
+        "stages": {},
+        "stageEdges": [],
+        "steps": {},
+        "stepEdges": []
+    }
+    stage_by_label: Dict[str, str] = {}
+    step_by_label: Dict[Tuple[str, str], str] = {}
+    step_counts: Dict[str, int] = {}
+    previous_last_stage: Optional[str] = None
+
+    for partial in partials:
+        for key in ("paper_title", "citation"):
+            if key in partial and key not in merged:
+                merged[key] = partial[key]
+
+        # Stages: reuse a matching stage or append a new one
+        stage_map: Dict[str, str] = {}
+        new_stages: List[str] = []
+        for old_id in sorted(partial.get("stages", {}), key=_id_sort_key):
+            stage = partial["stages"][old_id]
+            label = _normalize_label(stage.get("label", ""))
+            new_id = stage_by_label.get(label) if label else None
+            if new_id is None:
+                new_id = f"S{len(merged['stages']) + 1}"
+                merged["stages"][new_id] = dict(stage)
+                new_stages.append(new_id)
+                if label:
+                    stage_by_label[label] = new_id
+            stage_map[old_id] = new_id
+
+        # Steps: renumber under their (possibly remapped) stage, folding
+        # repeats of a step already extracted from an earlier chunk
+        step_map: Dict[str, str] = {}
+        for old_id in sorted(partial.get("steps", {}), key=_id_sort_key):
+            stage_id = stage_map.get(old_id.split(".")[0])
+            if stage_id is None:
+                continue
+            step = partial["steps"][old_id]
+            label_key = (stage_id, _normalize_label(step.get("label", "")))
+            new_id = step_by_label.get(label_key) if label_key[1] else None
+            if new_id is None:
+                step_counts[stage_id] = step_counts.get(stage_id, 0) + 1
+                new_id = f"{stage_id}.{step_counts[stage_id]}"
+                merged["steps"][new_id] = dict(step)
+                if label_key[1]:
+                    step_by_label[label_key] = new_id
+            step_map[old_id] = new_id
+
+        for edge_key, id_map in (("stageEdges", stage_map),
+                                 ("stepEdges", step_map)):
+            for edge in partial.get(edge_key, []):
+                source = id_map.get(edge.get("from"))
+                target = id_map.get(edge.get("to"))
+                if source and target:
+                    merged[edge_key].append({
+                        **edge, "from": source,
+                        "to": target
+                    })
+
+        # Link this chunk's first new stage to the previous chunk's last one
+        if previous_last_stage and new_stages:
+            first_stage = new_stages[0]
+            linked = any(edge["to"] == first_stage
+                         for edge in merged["stageEdges"])
+            if not linked:
+                merged["stageEdges"].append({
+                    "from": previous_last_stage,
+                    "to": first_stage,
+                    "label": "Sequential",
+                    "description": "Continues in the next part of the paper"
+                })
+        if new_stages:
+            previous_last_stage = new_stages[-1]
+
+    merged["stageEdges"] = _dedupe_edges(merged["stageEdges"])
+    merged["stepEdges"] = _dedupe_edges(merged["stepEdges"])
+    return merged
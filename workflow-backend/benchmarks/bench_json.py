@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON extraction, parsing and serialization on the LLM response path.
+
+Uses the raw Gemini responses recorded in gemini-logs.txt, scaled up to
+multi-hundred-KB payloads by repeating their steps, and compares the old
+find/split extractor plus stdlib json against json_codec.
+"Extract" returns the object text; "extract+parse" is the full path
+used by GeminiService._parse_response.
+
+Run from workflow-backend/:  python benchmarks/bench_json.py
+"""
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import json_codec  # noqa: E402
+
+LOG_PATH = os.path.join(os.path.dirname(__file__), "..", "gemini-logs.txt")
+LOG_PREFIX_RE = re.compile(r"^\d{4}-\d\d-\d\d [\d:,]+ - [\w.]+ - \w+ - ")
+SEPARATOR = "=" * 80
+TARGET_SIZES = [0, 100_000, 300_000, 800_000]  # 0 = response as logged
+ROUNDS = 20
+
+
+def legacy_extract(response_text: str) -> str:
+    """Extractor used before the single-pass version (for comparison)"""
+    # First, try to find JSON in markdown code blocks
+    if "```json" in response_text:
+        start = response_text.find("```json") + 7
+        end = response_text.find("```", start)
+        if end != -1:
+            return response_text[start:end].strip()
+
+    # Try to find JSON in generic code blocks
+    if response_text.startswith("```"):
+        lines = response_text.split('\n')
+        start_idx = 1
+        end_idx = len(lines) - 1
+        for i, line in enumerate(lines):
+            if line.strip().startswith('{'):
+                start_idx = i
+                break
+        for i in range(len(lines) - 1, -1, -1):
+            if lines[i].strip().endswith('}'):
+                end_idx = i + 1
+                break
+        return '\n'.join(lines[start_idx:end_idx])
+
+    # Handle <thinking> tags or other content before JSON
+    if not response_text.strip().startswith('{'):
+        json_start = response_text.find('{')
+        if json_start != -1:
+            # Find the matching closing brace
+            brace_count = 0
+            json_end = json_start
+            for i in range(json_start, len(response_text)):
+                if response_text[i] == '{':
+                    brace_count += 1
+                elif response_text[i] == '}':
+                    brace_count -= 1
+                    if brace_count == 0:
+                        json_end = i + 1
+                        break
+            return response_text[json_start:json_end]
+
+    # If it already looks like JSON, return as-is
+    return response_text.strip()
+
+
+def load_responses(path: str):
+    """Return the raw responses logged under "RAW GEMINI RESPONSE" markers"""
+    with open(path, encoding="utf-8") as f:
+        lines = [LOG_PREFIX_RE.sub("", line.rstrip("\n")) for line in f]
+
+    responses = []
+    i = 0
+    while i < len(lines):
+        if lines[i].endswith("RAW GEMINI RESPONSE:"):
+            start = i + 2  # skip the separator line
+            end = lines.index(SEPARATOR, start)
+            responses.append("\n".join(lines[start:end]))
+            i = end
+        i += 1
+    return responses
+
+
+def scale_response(response: str, target_size: int) -> str:
+    """Repeat the workflow's steps until the response reaches target_size"""
+    if not target_size:
+        return response
+    workflow = json.loads(legacy_extract(response))
+    # Current schema keys steps by id; older logs hold a "workflow" list
+    steps = dict(workflow["steps"]) if "steps" in workflow else None
+    items = list(workflow.get("workflow", []))
+    copy = 0
+    while len(json.dumps(workflow, indent=2)) < target_size:
+        copy += 1
+        if steps is not None:
+            for step_id, step in steps.items():
+                workflow["steps"][f"{step_id}.{copy}"] = step
+        elif items:
+            workflow["workflow"].extend(items)
+        else:
+            break
+    body = json.dumps(workflow, indent=2, ensure_ascii=False)
+    return f"<thinking>\nPlan the extraction.\n</thinking>\n```json\n{body}\n```"
+
+
+def legacy_parse(text: str):
+    return json.loads(legacy_extract(text))
+
+
+def best_of(func, *args):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    responses = load_responses(LOG_PATH)
+    print(f"Loaded {len(responses)} responses from {LOG_PATH}")
+    print(f"orjson available: {json_codec.orjson is not None}\n")
+
+    header = (f"{'resp':>4} {'size':>9} | {'extract old':>11} {'new':>8} | "
+              f"{'extract+parse old':>17} {'new':>8} | "
+              f"{'dump json':>9} {'codec':>8}")
+    print(header)
+    print("-" * len(header))
+
+    for index, response in enumerate(responses, 1):
+        for target in TARGET_SIZES:
+            text = scale_response(response, target)
+            parsed = json_codec.parse_json_object(text)
+            if legacy_parse(text) != parsed:
+                print(f"  response {index}: extractors disagree")
+
+            print(f"{index:>4} {len(text):>9,} | "
+                  f"{best_of(legacy_extract, text):>9.2f}ms "
+                  f"{best_of(json_codec.extract_json_object, text):>6.2f}ms | "
+                  f"{best_of(legacy_parse, text):>15.2f}ms "
+                  f"{best_of(json_codec.parse_json_object, text):>6.2f}ms | "
+                  f"{best_of(json.dumps, parsed):>7.2f}ms "
+                  f"{best_of(json_codec.dumps_bytes, parsed):>6.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Local stub of the OpenAlex works API for exercising /api/paper-graph.
+
+Serves a deterministic synthetic citation graph: work W<n> references
+REFERENCES_PER_WORK works and every request is delayed by --latency to
+mimic the real API. Supports the queries OpenAlexClient makes: title
+search, ids.openalex:W1|W2 filters, cites:W1 filters and select.
+
+Run from workflow-backend/:
+    python benchmarks/openalex_stub.py --port 8765 --latency 0.1
+    OPENALEX_BASE_URL=http://127.0.0.1:8765 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import re
+import time
+from typing import Any, Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+WORKS = 100_000
+REFERENCES_PER_WORK = 40
+WORK_URL = "https://openalex.org/W{}"
+
+app = FastAPI(title="OpenAlex stub")
+state = {"latency": 0.1, "requests": 0, "updated_date": "2024-01-01T00:00:00"}
+
+
+def references(n: int):
+    return [(n * 7 + k) % WORKS + 1 for k in range(1, REFERENCES_PER_WORK + 1)]
+
+
+def work(n: int) -> Dict[str, Any]:
+    return {
+        "id": WORK_URL.format(n),
+        "display_name": f"Synthetic paper {n}",
+        "publication_year": 1990 + n % 35,
+        "cited_by_count": n % 500,
+        "referenced_works": [WORK_URL.format(r) for r in references(n)],
+        "updated_date": state["updated_date"]
+    }
+
+
+def citing(n: int):
+    # Inverse of references(): m cites n when (m * 7 + k) % WORKS + 1 == n
+    inverse = pow(7, -1, WORKS)
+    return [((n - 1 - k) * inverse) % WORKS or WORKS
+            for k in range(1, REFERENCES_PER_WORK + 1)]
+
+
+@app.get("/works")
+async def works(request: Request) -> Dict[str, Any]:
+    state["requests"] += 1
+    await asyncio.sleep(state["latency"])
+    params = request.query_params
+    per_page = int(params.get("per-page", 25))
+    search = params.get("search")
+    if search:
+        match = re.search(r"\d+", search)
+        return {"results": [work(int(match.group()) if match else 1)]}
+
+    kind, _, value = params.get("filter", "").partition(":")
+    ids = [int(part.lstrip("W")) for part in value.split("|") if part]
+    if kind == "ids.openalex":
+        results = [work(n) for n in ids if 1 <= n <= WORKS]
+    elif kind == "cites":
+        found = dict.fromkeys(m for n in ids for m in citing(n))
+        results = sorted((work(m) for m in found),
+                         key=lambda w: -w["cited_by_count"])
+    else:
+        results = []
+    fields = params.get("select")
+    if fields:
+        keep = fields.split(",")
+        results = [{key: w[key] for key in keep if key in w} for w in results]
+    return {"meta": {"count": len(results)}, "results": results[:per_page]}
+
+
+@app.get("/stats")
+async def stats() -> Dict[str, Any]:
+    return {"requests": state["requests"]}
+
+
+@app.post("/touch")
+async def touch() -> Dict[str, Any]:
+    """Bump every work's updated_date, as if OpenAlex had refreshed them"""
+    state["updated_date"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    return {"updated_date": state["updated_date"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.1,
+                        help="seconds added to every response")
+    args = parser.parse_args()
+    state["latency"] = args.latency
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
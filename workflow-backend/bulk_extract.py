@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Generate workflows for a directory tree of PDFs without the HTTP server.
+
+Every PDF under the input directory goes through the same pipeline as
+POST /api/upload: text extraction in the PDF process pool, prompt
+reduction, Gemini (under the shared rate limits) and the workflow cache.
+Extraction and LLM calls are bounded separately.
+
+Results are appended to a JSONL file, one line per PDF, flushed as each
+paper finishes. The file doubles as the checkpoint: running the same
+command again skips every PDF already recorded, so an interrupted run
+resumes where it stopped. --retry-failed also redoes recorded failures,
+dropping their old records so each PDF keeps a single line.
+A throughput summary with p50/p95 per stage is printed at the end.
+
+Run from workflow-backend/:
+    python bulk_extract.py ~/papers results.jsonl --llm-concurrency 8
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+import config
+from app.services import json_codec
+from app.services.pdf_pool import extraction_pool
+from app.services.workflow_generator import WorkflowGenerator
+
+logger = logging.getLogger("bulk_extract")
+
+STAGES = ("pdf_extract", "prompt_reduce", "llm", "total")
+
+
+def find_pdfs(root: str) -> Iterator[str]:
+    """Yield the paths of PDFs under root relative to it, in sorted order"""
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(".pdf") and not name.startswith("."):
+                yield os.path.relpath(os.path.join(directory, name), root)
+
+
+def load_checkpoint(output: str, retry_failed: bool) -> Set[str]:
+    """
+    Read the paths already recorded in the output file.
+
+    A line cut off by an interrupted run is truncated away so new records
+    start on a fresh line. With retry_failed, the file is rewritten without
+    the failed records (keeping the last record per path), so a retried PDF
+    ends up with exactly one line.
+    """
+    if not os.path.exists(output):
+        return set()
+
+    records: Dict[str, Tuple[bool, bytes]] = {}
+    with open(output, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            logger.warning(f"Dropping incomplete last line of {output}")
+            f.truncate(end)
+        for line in data[:end].splitlines():
+            try:
+                record = json_codec.loads(line)
+            except ValueError:
+                continue
+            records.pop(record["path"], None)
+            records[record["path"]] = (bool(record.get("success")), line)
+
+    if retry_failed:
+        kept = [line for success, line in records.values() if success]
+        if len(kept) < len(data[:end].splitlines()):
+            logger.warning(f"Rewriting {output} without its failed records")
+            temp = output + ".tmp"
+            with open(temp, "wb") as f:
+                f.writelines(line + b"\n" for line in kept)
+            os.replace(temp, output)
+        return {
+            path
+            for path, (success, _) in records.items() if success
+        }
+    return set(records)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Summary:
+    """Counts results and per-stage timings for the throughput summary"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.skipped = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.cached = 0
+        self.timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    def add(self, record: Dict[str, Any]) -> None:
+        if record["success"]:
+            self.succeeded += 1
+            self.cached += record.get("cached", False)
+        else:
+            self.failed += 1
+        for stage, seconds in record.get("timings", {}).items():
+            self.timings.setdefault(stage, []).append(seconds)
+
+    def papers_per_minute(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.processed / elapsed * 60 if elapsed else 0.0
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        lines = [
+            f"Processed {self.processed} PDFs in {elapsed:.1f}s "
+            f"({self.papers_per_minute():.1f} papers/min): "
+            f"{self.succeeded} succeeded ({self.cached} cached), "
+            f"{self.failed} failed, {self.skipped} skipped from checkpoint"
+        ]
+        for stage, values in self.timings.items():
+            if values:
+                lines.append(f"  {stage:<14} n={len(values):<6} "
+                             f"p50={percentile(values, 0.5):7.2f}s  "
+                             f"p95={percentile(values, 0.95):7.2f}s")
+        return "\n".join(lines)
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def process(generator: WorkflowGenerator, root: str, path: str,
+                  parse_slots: asyncio.Semaphore,
+                  llm_slots: asyncio.Semaphore) -> Dict[str, Any]:
+    """Run one PDF through the pipeline and build its output record"""
+    started = time.perf_counter()
+    record: Dict[str, Any] = {"path": path, "success": False}
+    try:
+        pdf_bytes = await asyncio.to_thread(_read, os.path.join(root, path))
+        if len(pdf_bytes) > config.MAX_FILE_SIZE:
+            record["error"] = f"File size exceeds {config.MAX_FILE_SIZE} bytes"
+            return record
+        record["sha256"] = hashlib.sha256(pdf_bytes).hexdigest()
+        result = await generator.generate_workflow_from_pdf(
+            pdf_bytes=pdf_bytes,
+            filename=path,
+            content_hash=record["sha256"],
+            parse_slots=parse_slots,
+            llm_slots=llm_slots)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        return record
+
+    if not result["success"]:
+        record["error"] = result["error"]
+        return record
+    if result.get("fallback"):
+        # The sample workflow is not a result; leave it for a rerun
+        record["error"] = "Gemini did not return a usable workflow"
+        return record
+    timings = dict(result.get("timings", {}))
+    timings["total"] = time.perf_counter() - started
+    record.update({
+        "success": True,
+        "cached": result.get("cached", False),
+        "text_length": result.get("text_length"),
+        "prompt_text_length": result.get("prompt_text_length"),
+        "estimated_input_tokens": result.get("estimated_input_tokens"),
+        "prompt_trimming": result.get("prompt_trimming"),
+        "timings": {stage: round(s, 3) for stage, s in timings.items()},
+        "workflow": result["workflow"]
+    })
+    return record
+
+
+async def run(args: argparse.Namespace) -> Summary:
+    done = load_checkpoint(args.output, args.retry_failed)
+    generator = WorkflowGenerator()
+    parse_slots = asyncio.Semaphore(args.parse_concurrency)
+    llm_slots = asyncio.Semaphore(args.llm_concurrency)
+
+    # Workers pull paths lazily, so only the PDFs in progress are in memory
+    workers = args.parse_concurrency + args.llm_concurrency
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    summary = Summary()
+
+    with open(args.output, "a", encoding="utf-8") as output:
+
+        async def worker() -> None:
+            while True:
+                path = await queue.get()
+                if path is None:
+                    return
+                record = await process(generator, args.input, path,
+                                       parse_slots, llm_slots)
+                output.write(json_codec.dumps(record) + "\n")
+                output.flush()
+                summary.add(record)
+                if not record["success"]:
+                    logger.warning(f"{path}: {record['error']}")
+                if summary.processed % args.progress_every == 0:
+                    print(f"{summary.processed} done, {summary.failed} failed, "
+                          f"{summary.papers_per_minute():.1f} papers/min",
+                          file=sys.stderr)
+
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        for path in find_pdfs(args.input):
+            if path in done:
+                summary.skipped += 1
+                continue
+            await queue.put(path)
+        for _ in tasks:
+            await queue.put(None)
+        await asyncio.gather(*tasks)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate workflows for every PDF under a directory")
+    parser.add_argument("input", help="directory searched for PDFs")
+    parser.add_argument("output", help="JSONL results file (also the "
+                        "checkpoint; appended to)")
+    parser.add_argument("--parse-concurrency", type=int,
+                        default=config.PDF_WORKERS,
+                        help="PDFs extracted at once (default: PDF_WORKERS)")
+    parser.add_argument("--llm-concurrency", type=int,
+                        default=config.BATCH_LLM_CONCURRENCY,
+                        help="Gemini calls in flight at once "
+                        "(default: BATCH_LLM_CONCURRENCY)")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="process PDFs recorded as failed again")
+    parser.add_argument("--progress-every", type=int, default=25,
+                        help="print progress every N papers")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="log every pipeline stage")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if not os.path.isdir(args.input):
+        parser.error(f"{args.input} is not a directory")
+
+    extraction_pool.start()
+    try:
+        summary = asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume",
+              file=sys.stderr)
+        sys.exit(130)
+    finally:
+        extraction_pool.shutdown(wait=False)
+    print(summary.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,110 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "YOUR_NEW_API_KEY_HERE")
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", "52428800"))  # 50MB
 ALLOWED_EXTENSIONS = os.getenv("ALLOWED_EXTENSIONS", "pdf").split(",")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", "1048576"))  # 1MB
 
-# Create upload directory if it doesn't exist
+# PDF extraction process pool
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 2)))
+PDF_JOB_TIMEOUT = float(os.getenv("PDF_JOB_TIMEOUT", "120"))  # seconds
+# Large PDFs are converted in page-range shards in parallel (0 disables)
+PDF_SHARD_PAGES = int(os.getenv("PDF_SHARD_PAGES", "32"))
+PDF_SHARD_MIN_PAGES = int(os.getenv("PDF_SHARD_MIN_PAGES", "64"))
+# Parser probe thresholds and per-parser time budgets (seconds)
+PDF_PROBE_SAMPLE_PAGES = int(os.getenv("PDF_PROBE_SAMPLE_PAGES", "5"))
+PDF_PROBE_MIN_CHARS = int(os.getenv("PDF_PROBE_MIN_CHARS",
+                                    "100"))  # per page, else no text layer
+PDF_PROBE_MAX_GARBLED_RATIO = float(
+    os.getenv("PDF_PROBE_MAX_GARBLED_RATIO", "0.05"))
+PDF_PYMUPDF4LLM_MAX_PAGES = int(os.getenv("PDF_PYMUPDF4LLM_MAX_PAGES",
+                                          "400"))  # unsharded documents
+PDF_PYMUPDF4LLM_BUDGET = float(os.getenv("PDF_PYMUPDF4LLM_BUDGET", "60"))
+PDF_PYPDF2_BUDGET = float(os.getenv("PDF_PYPDF2_BUDGET", "30"))
+PDF_PROBE_BUDGET = float(os.getenv("PDF_PROBE_BUDGET", "10"))
+
+# Gemini client
+GEMINI_MAX_IN_FLIGHT = int(os.getenv("GEMINI_MAX_IN_FLIGHT", "32"))
+
+# Gemini quota (shared by all Gemini calls; 0 disables a limit)
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE",
+                                           "15"))
+GEMINI_TOKENS_PER_MINUTE = int(os.getenv("GEMINI_TOKENS_PER_MINUTE",
+                                         "1000000"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+GEMINI_RETRY_BASE_DELAY = float(os.getenv("GEMINI_RETRY_BASE_DELAY",
+                                          "1"))  # seconds
+GEMINI_RETRY_MAX_DELAY = float(os.getenv("GEMINI_RETRY_MAX_DELAY",
+                                         "60"))  # seconds
+
+# Prompt reduction (keep methods/results sections within a token budget)
+PROMPT_REDUCTION_ENABLED = os.getenv("PROMPT_REDUCTION_ENABLED",
+                                     "true").lower() == "true"
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "30000"))
+# Hard cap on estimated tokens per Gemini prompt, template included; paper
+# text is trimmed (least valuable sections first) to fit
+PROMPT_INPUT_TOKEN_BUDGET = int(os.getenv("PROMPT_INPUT_TOKEN_BUDGET",
+                                          "32000"))
+
+# Map-reduce extraction for long papers
+MAPREDUCE_ENABLED = os.getenv("MAPREDUCE_ENABLED", "true").lower() == "true"
+MAPREDUCE_THRESHOLD_TOKENS = int(os.getenv("MAPREDUCE_THRESHOLD_TOKENS",
+                                           "20000"))
+MAPREDUCE_CHUNK_TOKENS = int(os.getenv("MAPREDUCE_CHUNK_TOKENS", "10000"))
+MAPREDUCE_CONCURRENCY = int(os.getenv("MAPREDUCE_CONCURRENCY", "4"))
+
+# Enrichment (items per batched LLM call)
+ENRICHMENT_BATCH_SIZE = int(os.getenv("ENRICHMENT_BATCH_SIZE", "20"))
+# Enrich every generated workflow's reagents/equipment in the background
+ENRICHMENT_PREWARM_ENABLED = os.getenv("ENRICHMENT_PREWARM_ENABLED",
+                                       "true").lower() == "true"
+ENRICHMENT_PREWARM_MAX_PENDING = int(os.getenv("ENRICHMENT_PREWARM_MAX_PENDING",
+                                               "8"))
+
+# Background workflow jobs
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))  # seconds
+
+# Batch uploads (POST /api/upload/batch)
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "200"))
+BATCH_MAX_ZIP_SIZE = int(os.getenv("BATCH_MAX_ZIP_SIZE",
+                                   "524288000"))  # 500MB, also uncompressed
+BATCH_PARSE_CONCURRENCY = int(os.getenv("BATCH_PARSE_CONCURRENCY",
+                                        str(PDF_WORKERS)))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+
+# Workflow cache (keyed by PDF hash + prompt/model version)
+CACHE_DIR = os.getenv("CACHE_DIR", "./cache")
+WORKFLOW_CACHE_ENABLED = os.getenv("WORKFLOW_CACHE_ENABLED",
+                                   "true").lower() == "true"
+WORKFLOW_CACHE_MAX_BYTES = int(os.getenv("WORKFLOW_CACHE_MAX_BYTES",
+                                         "536870912"))  # 512MB
+
+# Enrichment cache (keyed by normalized term + context + model)
+ENRICHMENT_CACHE_ENABLED = os.getenv("ENRICHMENT_CACHE_ENABLED",
+                                     "true").lower() == "true"
+ENRICHMENT_CACHE_MAX_BYTES = int(os.getenv("ENRICHMENT_CACHE_MAX_BYTES",
+                                           "67108864"))  # 64MB
+ENRICHMENT_CACHE_TTL = int(os.getenv("ENRICHMENT_CACHE_TTL",
+                                     "2592000"))  # 30 days
+
+# OpenAlex (paper citation graph)
+OPENALEX_BASE_URL = os.getenv("OPENALEX_BASE_URL", "https://api.openalex.org")
+OPENALEX_MAILTO = os.getenv("OPENALEX_MAILTO", "")  # joins the polite pool
+OPENALEX_BATCH_SIZE = int(os.getenv("OPENALEX_BATCH_SIZE",
+                                    "50"))  # ids per filter query (max 50)
+OPENALEX_MAX_CONCURRENCY = int(os.getenv("OPENALEX_MAX_CONCURRENCY", "4"))
+OPENALEX_TIMEOUT = float(os.getenv("OPENALEX_TIMEOUT", "20"))  # seconds
+OPENALEX_GRAPH_TIME_BUDGET = float(os.getenv("OPENALEX_GRAPH_TIME_BUDGET",
+                                             "10"))  # seconds per graph
+
+# Local OpenAlex work store (read-through cache for the citation graph)
+OPENALEX_STORE_ENABLED = os.getenv("OPENALEX_STORE_ENABLED",
+                                   "true").lower() == "true"
+OPENALEX_STORE_MAX_WORKS = int(os.getenv("OPENALEX_STORE_MAX_WORKS",
+                                         "500000"))
+OPENALEX_STORE_TTL = int(os.getenv("OPENALEX_STORE_TTL",
+                                   "604800"))  # 7 days, then revalidated
+
+# Create upload and cache directories if they don't exist
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+os.makedirs(CACHE_DIR, exist_ok=True)